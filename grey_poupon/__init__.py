@@ -1,3 +1,8 @@
 from grey_poupon.client import GreyPoupon
-from grey_poupon.sync_projects import sync_metrics
+from grey_poupon.sync_projects import sync_metrics, sync_objects
+from grey_poupon.export_data import export_raw_reports
+from grey_poupon.upload_data import load_data
+from grey_poupon.project_pool import ProjectPool
+from grey_poupon.incremental_backup import backup_objects, restore_objects
+from grey_poupon.config_store import ConfigStore
 from grey_poupon.gp_cli import gp_cli
\ No newline at end of file
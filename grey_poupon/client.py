@@ -1,11 +1,15 @@
 import requests
 import logging
 import json
+import hashlib
+import os
 import time
 from typing import Generator
 from datetime import date, datetime, timedelta
 
 from .http_errors import *
+from .tracing import traced, tracer
+from .single_flight import SingleFlight
 
 logging.basicConfig(level=logging.INFO)
 
@@ -16,6 +20,14 @@ logging.basicConfig(level=logging.INFO)
 
 # product/version (your_email@example.com)
 
+# metadata category -> /gdc/md/{project_id}/query/{resource}
+QUERY_RESOURCES = {
+    'metric': 'metrics',
+    'report': 'reports',
+    'projectDashboard': 'projectdashboards',
+    'attribute': 'attributes',
+}
+
 
 class AuthenticationProblem(Exception):
     def __init__(self, expression, status, body):
@@ -45,13 +57,38 @@ class GreyPoupon(object):
 
     If SST is not provided, user must call the authenticate() method.
 
+    Files for data loads are uploaded to the user staging area, by default
+    https://<sub-domain>.gooddata.com/gdc/uploads, or to staging_url if
+    given (e.g. a local WebDAV server).
+
+    Identical GET requests running at the same time (e.g. several workers
+    polling the same task) share one network request. Results of read
+    endpoints (listings, objects, project information) are also memoised
+    for cache_ttl seconds; task status and project state polls are never
+    memoised. Set cache_ttl to 0 to only coalesce concurrent requests.
+
     ....
 
     """
 
-    def __init__(self, sub_domain: str, sst: str = None) -> None:
+    def __init__(self,
+                 sub_domain: str,
+                 sst: str = None,
+                 staging_url: str = None,
+                 pool_size: int = 10,
+                 cache_ttl: float = 2.0) -> None:
         self.base_url = 'https://%s.gooddata.com' % sub_domain
         self.sub_domain = sub_domain
+        self.staging_url = staging_url or self.base_url + '/gdc/uploads'
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._single_flight = SingleFlight(ttl=cache_ttl)
 
         if sst:
             self.temp_token = self._get_tt(sst=sst)
@@ -79,6 +116,30 @@ class GreyPoupon(object):
         }
         return headers
 
+    def _get(self, url: str, memoise: bool = True) -> requests.Response:
+        """
+        GET request shared by all concurrent callers of the same url,
+        memoised for cache_ttl seconds if successful. Every request
+        changing the metadata forgets the memoised responses.
+
+        :param url: full url of the resource
+        :param memoise: False for status polls, only coalesce
+        concurrent requests
+        :return: response
+        """
+        return self._single_flight.do(
+            key=(url, self.temp_token),
+            func=lambda: self.session.get(url, headers=self.headers),
+            cacheable=lambda res: memoise and res.status_code == 200,
+            use_cache=memoise
+        )
+
+    def clear_cache(self) -> None:
+        """
+        Forget all memoised GET responses.
+        """
+        self._single_flight.forget()
+
     def authenticate(self,
                      sst: str = None,
                      user: str = None,
@@ -107,6 +168,7 @@ class GreyPoupon(object):
         else:
             raise CredentialsMissing()
 
+    @traced
     def _get_sst(self,
                  user: str,
                  password: str,
@@ -146,6 +208,7 @@ class GreyPoupon(object):
                 body=res.text
             )
 
+    @traced
     def _get_tt(self, sst: str) -> str:
         """
         Request a temporary token from GoodData using
@@ -171,6 +234,7 @@ class GreyPoupon(object):
                 body=res.text
             )
 
+    @traced
     def list_metrics(self, project_id: str) -> Generator[str, None, None]:
         """
         Generates a list of metrics within a project.
@@ -179,15 +243,38 @@ class GreyPoupon(object):
         get the list of metrics
         :return: list of metrics is yielded
         """
-        url = '{base}/gdc/md/{project_id}/query/metrics'
-        res = requests.get(
-            url=url.format(base=self.base_url, project_id=project_id),
-            headers=self.headers
-        )
-        for metric in res.json().get('query').get('entries'):
-            if metric.get('category') == 'metric':
-                yield metric
+        yield from self.list_objects(project_id=project_id,
+                                     categories=('metric',))
+
+    @traced
+    def list_objects(self,
+                     project_id: str,
+                     categories: tuple = ('metric',)) -> Generator[dict, None, None]:
+        """
+        Generates a list of metadata objects of the given categories
+        within a project, in a single pass over the categories.
+
+        :param project_id: ID of the project for which you want to
+        get the list of objects
+        :param categories: metadata categories to list, see QUERY_RESOURCES
+        :return: list of objects is yielded
+        """
+        url = '{base}/gdc/md/{project_id}/query/{resource}'
+        for category in categories:
+            res = self._get(url.format(
+                base=self.base_url,
+                project_id=project_id,
+                resource=QUERY_RESOURCES[category]
+            ))
+            if not res.status_code == 200:
+                print(res.text)
+                raise Exception(res.status_code)
+
+            for obj in res.json().get('query').get('entries'):
+                if obj.get('category') == category:
+                    yield obj
 
+    @traced
     def download_list_of_metrics(self,
                                  project_id: str,
                                  download_path: str) -> None:
@@ -201,14 +288,12 @@ class GreyPoupon(object):
         :return: 
         """
         url = '{base}/gdc/md/{project_id}/query/metrics'
-        res = requests.get(
-            url=url.format(base=self.base_url, project_id=project_id),
-            headers=self.headers
-        )
+        res = self._get(url.format(base=self.base_url, project_id=project_id))
 
         with open(download_path, 'w') as download_file:
             json.dump(res.json(), fp=download_file)
 
+    @traced
     def export_project(self,
                        project_id: str,
                        include_users: bool = False,
@@ -247,6 +332,23 @@ class GreyPoupon(object):
             print(res.text)
             raise Exception(res.status_code)
 
+    @traced
+    def get_task_status(self, status_uri: str) -> str:
+        """
+        Status of an export or import task.
+
+        :param status_uri: uri returned when the task was started
+        :return: RUNNING, OK, WARNING or ERROR
+        """
+        url = self.base_url + status_uri
+        res = self._get(url, memoise=False)
+        if res.status_code == 200:
+            return res.json().get('wTaskStatus').get('status')
+        else:
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
     def is_export_done(self, status_uri: str) -> bool:
         """
         
@@ -254,13 +356,14 @@ class GreyPoupon(object):
         :return: 
         """
         url = self.base_url + status_uri
-        res = requests.get(url, headers=self.headers)
+        res = self._get(url, memoise=False)
         if res.status_code == 200:
             status = res.json().get('wTaskStatus').get('status')
             return status == 'OK'
         else:
             print(res.text)
 
+    @traced
     def import_project(self, project_id: str, token: str) -> str:
         """
         
@@ -279,18 +382,21 @@ class GreyPoupon(object):
             headers=self.headers,
             data=json.dumps(body)
         )
+        self._single_flight.forget()
         if res.status_code == 200:
             return res.json().get('uri')
         else:
             print(res.text)
             raise Exception(res.status_code)
 
+    @traced
     def create_project(self,
                        token: str,
                        title: str,
                        summary: str = None,
                        db: str = 'Pg',
-                       environment: str = 'DEVELOPMENT') -> str:
+                       environment: str = 'DEVELOPMENT',
+                       project_template: str = None) -> str:
         """
                 
         :param token: 
@@ -298,14 +404,12 @@ class GreyPoupon(object):
         :param summary:
         :param db: Database type: "Pg" or ??
         :param environment: PRODUCTION, DEVELOPMENT, TESTING
+        :param project_template: uri of the template to create the project
+        from, "/projectTemplates/{name}/{version}"
         :return: 
         """
         url = '{base}/gdc/projects'
 
-        project_template = {
-            "projectTemplate": "/projectTemplates/{name}/{version}"
-        }
-
         body = {
             "project": {
                 "content": {
@@ -320,27 +424,34 @@ class GreyPoupon(object):
                 }
             }
         }
+        if project_template:
+            body['project']['meta']['projectTemplate'] = project_template
+
         res = requests.post(
             url=url.format(base=self.base_url),
             headers=self.headers,
             data=json.dumps(body)
         )
-        if res.status_code == 200:
+        if res.status_code in (200, 201):
             return res.json().get('uri').split('/')[-1]
         else:
             print(res.text)
             raise Exception(res.status_code)
 
-    def get_project_information(self, project_id: str) -> dict:
+    @traced
+    def get_project_information(self,
+                                project_id: str,
+                                memoise: bool = True) -> dict:
         """
         
         :param project_id: 
+        :param memoise: False to always read the current information
         :return: 
         """
         url = '{base}/gdc/projects/{project_id}'
-        res = requests.post(
-            url=url.format(base=self.base_url, project_id=project_id),
-            headers=self.headers
+        res = self._get(
+            url.format(base=self.base_url, project_id=project_id),
+            memoise=memoise
         )
         if res.status_code == 200:
             return res.json().get('project')
@@ -348,61 +459,209 @@ class GreyPoupon(object):
             print(res.text)
             raise Exception(res.status_code)
 
+    @traced
     def get_project_state(self, project_id: str) -> str:
         """
         
         :param project_id: 
         :return: 
         """
-        info = self.get_project_information(project_id)
+        info = self.get_project_information(project_id, memoise=False)
         return info.get('content').get('state')
 
+    @traced
+    def wait_for_project(self, project_id: str, timeout: int = 600) -> None:
+        """
+        Wait until a newly created project is ENABLED.
+
+        :param project_id:
+        :param timeout: seconds to wait at most
+        :raise Exception: if the project ends up DELETED, ARCHIVED or in
+        ERROR, or is not ENABLED within timeout
+        """
+        deadline = time.monotonic() + timeout
+
+        with tracer.span('project.enable_wait', project_id=project_id):
+            while True:
+                state = self.get_project_state(project_id)
+                if state == 'ENABLED':
+                    return
+                if state in ('DELETED', 'ARCHIVED', 'ERROR'):
+                    raise Exception('Project %s is %s.' % (project_id, state))
+                if time.monotonic() > deadline:
+                    raise Exception('Project %s not ENABLED after %s s, '
+                                    'state %s.' % (project_id, timeout, state))
+                time.sleep(1)
+
+    @traced
+    def create_ready_project(self,
+                             token: str,
+                             title: str,
+                             db: str = 'Pg',
+                             environment: str = 'DEVELOPMENT',
+                             project_template: str = None,
+                             timeout: int = 600) -> str:
+        """
+        Create a project and wait until it is ENABLED.
+
+        :param timeout: seconds to wait at most for the project
+        to be ENABLED, see wait_for_project
+        :return: ID of the new project
+        """
+        project_id = self.create_project(
+            token=token,
+            title=title,
+            db=db,
+            environment=environment,
+            project_template=project_template
+        )
+        self.wait_for_project(project_id=project_id, timeout=timeout)
+
+        return project_id
+
+    @traced
+    def rename_project(self,
+                       project_id: str,
+                       title: str,
+                       summary: str = None) -> None:
+        """
+
+        :param project_id:
+        :param title: new title of the project
+        :param summary: new summary of the project
+        """
+        url = '{base}/gdc/projects/{project_id}'
+        body = {
+            "project": {
+                "meta": {
+                    "title": title,
+                    "summary": summary
+                }
+            }
+        }
+        res = requests.put(
+            url=url.format(base=self.base_url, project_id=project_id),
+            headers=self.headers,
+            data=json.dumps(body)
+        )
+        self._single_flight.forget()
+        if res.status_code not in (200, 204):
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def delete_project(self, project_id: str) -> None:
+        """
+
+        :param project_id:
+        """
+        url = '{base}/gdc/projects/{project_id}'
+        res = requests.delete(
+            url=url.format(base=self.base_url, project_id=project_id),
+            headers=self.headers
+        )
+        self._single_flight.forget()
+        if res.status_code not in (200, 204):
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def clone_project(self,
+                      project_id: str,
+                      create_project_token: str,
+                      title: str,
+                      include_users: bool = False,
+                      include_data: bool = False,
+                      include_schedules: bool = False,
+                      pool=None) -> str:
+        """
+        Export a project and import it into a new, empty project.
+
+        If a ProjectPool is given, the new project is taken from the pool
+        instead of being created, so only the export and import are left
+        on the critical path.
+
+        :param project_id: ID of the project to clone
+        :param create_project_token: authorization token for creating
+        the new project
+        :param title: title of the new project
+        :param include_users: 
+        :param include_data: 
+        :param include_schedules: 
+        :param pool: optional grey_poupon.ProjectPool
+        :return: ID of the new project
+        """
+        info = self.get_project_information(project_id=project_id)
+        environment = info.get('content').get('environment')
+        driver = info.get('content').get('driver', 'Pg')
+
+        status_uri, token = self.export_project(
+            project_id=project_id,
+            include_users=include_users,
+            include_data=include_data,
+            include_schedules=include_schedules
+        )
+
+        if pool:
+            new_pid = pool.acquire(
+                environment=environment,
+                driver=driver,
+                title=title
+            )
+        else:
+            new_pid = self.create_ready_project(
+                token=create_project_token,
+                title=title,
+                db=driver,
+                environment=environment,
+            )
+
+        with tracer.span('clone.export_wait', project_id=project_id):
+            while not self.is_export_done(status_uri):
+                time.sleep(1)
+
+        status_uri = self.import_project(project_id=new_pid, token=token)
+
+        with tracer.span('clone.import_wait', project_id=new_pid):
+            while not self.is_export_done(status_uri):
+                time.sleep(1)
+
+        return new_pid
+
+    @traced
     def backup_project(self,
                        project_id: str,
                        create_project_token: str,
                        include_users: bool = False,
                        include_data: bool = False,
-                       include_schedules: bool = False) -> str:
+                       include_schedules: bool = False,
+                       pool=None) -> str:
         """
         
         :param project_id: 
         :param include_users: 
         :param include_data: 
         :param include_schedules: 
+        :param pool: optional grey_poupon.ProjectPool providing
+        the backup project
         :return: 
         """
         info = self.get_project_information(project_id=project_id)
         title = info.get('meta').get('title')
-        environment = info.get('content').get('environment')
         today = date.isoformat(date.today())
         print('start export')
 
-        status_uri, token = self.export_project(
+        return self.clone_project(
             project_id=project_id,
+            create_project_token=create_project_token,
+            title='Backup%s %s' % (today, title),
             include_users=include_users,
             include_data=include_data,
-            include_schedules=include_schedules
+            include_schedules=include_schedules,
+            pool=pool
         )
 
-        bkp_pid = self.create_project(
-            token=create_project_token,
-            title='Backup%s %s' % (today, title),
-            environment=environment,
-        )
-
-        while not self.is_export_done(status_uri):
-            time.sleep(1)
-
-        while not self.get_project_state(project_id) == 'ENABLED':
-            time.sleep(1)
-
-        status_uri = self.import_project(project_id=bkp_pid, token=token)
-
-        while not self.is_export_done(status_uri):
-            time.sleep(1)
-
-        return bkp_pid
-
+    @traced
     def export_objects(self,
                        project_id: str,
                        object_uris: list,
@@ -442,6 +701,7 @@ class GreyPoupon(object):
             print(res.text)
             raise Exception(res.status_code)
 
+    @traced
     def import_objects(self,
                        project_id: str,
                        token: str,
@@ -475,6 +735,7 @@ class GreyPoupon(object):
             data=json.dumps(body),
             headers=self.headers
         )
+        self._single_flight.forget()
 
         if res.status_code == 200:
             return res.json().get('uri')
@@ -482,10 +743,19 @@ class GreyPoupon(object):
             print(res.text)
             raise Exception(res.status_code)
 
+    @traced
     def delete_objects(self,
                        project_id: str,
-                       object_uris: list):
+                       object_uris: list) -> list:
+        """
+        Delete objects one by one, in the given order.
+
+        :param project_id:
+        :param object_uris: GoodData uris of the objects to delete
+        :return: uris of the objects that could not be deleted
+        """
         url = '{base}{object_uri}'
+        failed = []
 
         for object_uri in object_uris:
             res = requests.delete(
@@ -493,4 +763,341 @@ class GreyPoupon(object):
                 headers=self.headers
             )
             if not res.status_code == 204:
-                print(res.status_code, res.text)
\ No newline at end of file
+                print(res.status_code, res.text)
+                failed.append(object_uri)
+
+        self._single_flight.forget()
+        return failed
+
+    @traced
+    def update_object(self, object_uri: str, definition: dict) -> None:
+        """
+        Overwrite the definition of an existing metadata object.
+
+        :param object_uri: GoodData uri of the object, "/gdc/md/{pid}/obj/{id}"
+        :param definition: the object definition, as returned by get_object
+        """
+        res = requests.put(
+            url=self.base_url + object_uri,
+            headers=self.headers,
+            data=json.dumps(definition)
+        )
+        self._single_flight.forget()
+        if res.status_code not in (200, 204):
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def create_object(self, project_id: str, definition: dict) -> str:
+        """
+        Create a metadata object.
+
+        :param project_id: ID of the project where to create the object
+        :param definition: the object definition, as returned by get_object
+        :return: GoodData uri of the new object
+        """
+        url = '{base}/gdc/md/{project_id}/obj'
+        res = requests.post(
+            url=url.format(base=self.base_url, project_id=project_id),
+            headers=self.headers,
+            data=json.dumps(definition)
+        )
+        self._single_flight.forget()
+        if res.status_code in (200, 201):
+            return res.json().get('uri')
+        else:
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def get_object(self, object_uri: str) -> dict:
+        """
+        Definition of a metadata object.
+
+        :param object_uri: GoodData uri of the object, "/gdc/md/{pid}/obj/{id}"
+        :return: the object definition
+        """
+        res = self._get(self.base_url + object_uri)
+        if res.status_code == 200:
+            return res.json()
+        else:
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def execute_raw_report(self, project_id: str, report_uri: str) -> str:
+        """
+        Start the raw (CSV) export of a report. Returns the uri where
+        the result can be polled for and downloaded from.
+
+        :param project_id: ID of the project where the report lives
+        :param report_uri: GoodData uri of the report to be exported
+        :return: uri of the raw export result
+        """
+        url = '{base}/gdc/app/projects/{project_id}/execute/raw'
+        body = {
+            "report_req": {
+                "report": report_uri
+            }
+        }
+        res = requests.post(
+            url=url.format(base=self.base_url, project_id=project_id),
+            headers=self.headers,
+            data=json.dumps(body)
+        )
+        if res.status_code in (200, 201):
+            return res.json().get('uri')
+        else:
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def download_raw_report(self,
+                            result_uri: str,
+                            download_path: str,
+                            chunk_size: int = 1024 * 1024,
+                            timeout: tuple = (10, 60)) -> bool:
+        """
+        Stream the result of a raw report export into a file, chunk by
+        chunk, without holding the whole CSV in memory.
+
+        Data is written into "<download_path>.part" and the file is
+        renamed to download_path once complete. The result uri (and ETag,
+        if the server sends one) is kept in "<download_path>.part.json".
+        If a partial file of the same result already exists, the download
+        resumes from where it stopped using an HTTP Range request,
+        otherwise it starts over.
+
+        :param result_uri: uri returned by execute_raw_report
+        :param download_path: path to CSV file where to store the result
+        :param chunk_size: number of bytes read from the socket at once
+        :param timeout: (connect, read) timeout in seconds
+        :return: True if the file was downloaded, False if the export
+        is not finished yet
+        """
+        url = self.base_url + result_uri
+        part_path = download_path + '.part'
+        state_path = part_path + '.json'
+        headers = dict(self.headers, Accept='text/csv')
+
+        state = {}
+        if os.path.exists(state_path):
+            with open(state_path) as state_file:
+                state = json.load(state_file)
+
+        offset = 0
+        if os.path.exists(part_path) \
+                and state.get('result_uri') == result_uri:
+            offset = os.path.getsize(part_path)
+        if offset:
+            headers['Range'] = 'bytes=%s-' % offset
+            if state.get('etag'):
+                headers['If-Range'] = state['etag']
+
+        with self.session.get(url, headers=headers, stream=True,
+                              timeout=timeout) as res:
+            if res.status_code == 202:
+                return False
+            elif res.status_code == 204:
+                mode = 'wb'
+            elif res.status_code == 206:
+                mode = 'ab'
+            elif res.status_code in (200, 201):
+                # no partial file, or the server ignored the Range header
+                mode = 'wb'
+            elif res.status_code == 416 and offset:
+                # nothing left to download
+                mode = None
+            else:
+                print(res.text)
+                raise Exception(res.status_code)
+
+            if mode == 'wb':
+                with open(state_path, 'w') as state_file:
+                    json.dump({
+                        'result_uri': result_uri,
+                        'etag': res.headers.get('ETag')
+                    }, state_file)
+
+            if mode:
+                with open(part_path, mode) as download_file:
+                    for chunk in res.iter_content(chunk_size=chunk_size):
+                        download_file.write(chunk)
+
+        os.replace(part_path, download_path)
+        os.remove(state_path)
+        return True
+
+    @traced
+    def export_raw_report(self,
+                          project_id: str,
+                          report_uri: str,
+                          download_path: str,
+                          poll_interval: int = 5,
+                          max_retries: int = 5,
+                          timeout: tuple = (10, 60)) -> str:
+        """
+        Export a report as raw CSV into a file. The export task is started
+        and polled until the result is ready, then streamed to disk.
+        Interrupted downloads are resumed up to max_retries times.
+
+        :param project_id: ID of the project where the report lives
+        :param report_uri: GoodData uri of the report to be exported
+        :param download_path: path to CSV file where to store the result
+        :param poll_interval: seconds to wait between polls
+        :param max_retries: how many times to resume a broken download
+        :param timeout: (connect, read) timeout of the download in seconds
+        :return: download_path
+        """
+        result_uri = self.execute_raw_report(
+            project_id=project_id,
+            report_uri=report_uri
+        )
+
+        retries = 0
+        while True:
+            try:
+                if self.download_raw_report(result_uri, download_path,
+                                            timeout=timeout):
+                    return download_path
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout) as e:
+                retries += 1
+                if retries > max_retries:
+                    raise
+                logging.warning(
+                    'Download of %s interrupted (%s), resuming ...' % (
+                        report_uri, e)
+                )
+                continue
+
+            logging.info('Waiting for raw export of %s ...' % report_uri)
+            time.sleep(poll_interval)
+
+    @traced
+    def make_staging_dir(self, directory: str) -> None:
+        """
+        Create a directory in the user staging area (WebDAV MKCOL).
+        Nothing happens if the directory already exists.
+
+        :param directory: name of the directory to create
+        """
+        url = '{staging}/{directory}/'.format(
+            staging=self.staging_url, directory=directory)
+        res = self.session.request('MKCOL', url, headers=self.headers)
+        if res.status_code not in (200, 201, 405):
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def get_staging_file_size(self, remote_path: str) -> int:
+        """
+        Size of a file in the user staging area.
+
+        :param remote_path: path of the file relative to the staging area
+        :return: size in bytes or None if the file does not exist
+        """
+        url = '{staging}/{path}'.format(
+            staging=self.staging_url, path=remote_path)
+        res = self.session.head(url, headers=self.headers)
+        if res.status_code == 200:
+            return int(res.headers.get('Content-Length', 0))
+        elif res.status_code == 404:
+            return None
+        else:
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def get_staging_file_sha256(self,
+                                remote_path: str,
+                                chunk_size: int = 1024 * 1024) -> str:
+        """
+        Read a file of the user staging area back and compute its
+        sha256 checksum. The file is streamed, not held in memory.
+
+        :param remote_path: path of the file relative to the staging area
+        :param chunk_size: number of bytes read from the socket at once
+        :return: hex digest or None if the file does not exist
+        """
+        url = '{staging}/{path}'.format(
+            staging=self.staging_url, path=remote_path)
+        with self.session.get(url, headers=self.headers, stream=True) as res:
+            if res.status_code == 404:
+                return None
+            elif res.status_code != 200:
+                print(res.text)
+                raise Exception(res.status_code)
+
+            checksum = hashlib.sha256()
+            for chunk in res.iter_content(chunk_size=chunk_size):
+                checksum.update(chunk)
+            return checksum.hexdigest()
+
+    @traced
+    def upload_to_staging(self, local_path: str, remote_path: str) -> None:
+        """
+        Upload a file into the user staging area (WebDAV PUT). The file
+        is streamed from disk.
+
+        :param local_path: path of the file to upload
+        :param remote_path: path of the file relative to the staging area
+        """
+        url = '{staging}/{path}'.format(
+            staging=self.staging_url, path=remote_path)
+        headers = dict(self.headers, **{
+            'Content-Type': 'application/octet-stream',
+            'Content-Length': str(os.path.getsize(local_path))
+        })
+        with open(local_path, 'rb') as upload_file:
+            res = self.session.put(url, headers=headers, data=upload_file)
+        if res.status_code not in (200, 201, 204):
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def start_data_load(self, project_id: str, directory: str) -> str:
+        """
+        Trigger the data load (pull ETL) of a directory previously
+        uploaded into the user staging area.
+
+        :param project_id: ID of the project where to load the data
+        :param directory: name of the directory in the staging area
+        :return: uri to poll for the status of the data load
+        """
+        url = '{base}/gdc/md/{project_id}/etl/pull2'
+        body = {
+            "pullIntegration": directory
+        }
+        res = self.session.post(
+            url=url.format(base=self.base_url, project_id=project_id),
+            headers=self.headers,
+            data=json.dumps(body)
+        )
+        if res.status_code in (200, 201):
+            return res.json().get('pull2Task').get('links').get('poll')
+        else:
+            print(res.text)
+            raise Exception(res.status_code)
+
+    @traced
+    def is_data_load_done(self, poll_uri: str) -> bool:
+        """
+
+        :param poll_uri: uri returned by start_data_load
+        :return: True once the data load finished successfully
+        """
+        url = self.base_url + poll_uri
+        res = self._get(url, memoise=False)
+        if res.status_code == 202:
+            return False
+        elif res.status_code == 200:
+            status = res.json().get('wTaskStatus').get('status')
+            if status == 'ERROR':
+                print(res.text)
+                raise Exception('Data load failed: %s' % poll_uri)
+            return status == 'OK'
+        else:
+            print(res.text)
+            raise Exception(res.status_code)
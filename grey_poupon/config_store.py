@@ -0,0 +1,184 @@
+import json
+import sqlite3
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS workspaces (
+    sub_domain TEXT NOT NULL,
+    master_pid TEXT NOT NULL,
+    PRIMARY KEY (sub_domain, master_pid)
+);
+CREATE TABLE IF NOT EXISTS slaves (
+    sub_domain TEXT NOT NULL,
+    master_pid TEXT NOT NULL,
+    slave_pid TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    categories TEXT NOT NULL DEFAULT '["metric"]',
+    PRIMARY KEY (sub_domain, master_pid, slave_pid, tag),
+    FOREIGN KEY (sub_domain, master_pid)
+        REFERENCES workspaces (sub_domain, master_pid) ON DELETE CASCADE
+);
+DROP INDEX IF EXISTS workspaces_master;
+CREATE INDEX IF NOT EXISTS slaves_master ON slaves (master_pid);
+CREATE INDEX IF NOT EXISTS slaves_slave ON slaves (slave_pid);
+CREATE INDEX IF NOT EXISTS slaves_tag ON slaves (tag);
+'''
+
+
+class ConfigStore(object):
+    """
+    Sync configuration (master workspaces and their slaves) kept in an
+    indexed SQLite database. Every change runs in a single transaction.
+
+    Tasks use the same format as config_sync.json:
+        {'sub_domain': ..., 'master_pid': ...,
+         'slaves': [{'slave_pid': ..., 'tag': ..., 'categories': [...]}]}
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def is_empty(self) -> bool:
+        cursor = self.connection.execute('SELECT 1 FROM workspaces LIMIT 1')
+        return cursor.fetchone() is None
+
+    def _set_slaves(self, sub_domain: str, master_pid: str, slaves: list) -> None:
+        self.connection.execute(
+            'INSERT OR IGNORE INTO workspaces (sub_domain, master_pid) '
+            'VALUES (?, ?)', (sub_domain, master_pid)
+        )
+        self.connection.execute(
+            'DELETE FROM slaves WHERE sub_domain = ? AND master_pid = ?',
+            (sub_domain, master_pid)
+        )
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO slaves '
+            '(sub_domain, master_pid, slave_pid, tag, categories) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(sub_domain, master_pid, slave['slave_pid'], slave['tag'],
+              json.dumps(slave.get('categories', ['metric'])))
+             for slave in slaves]
+        )
+
+    def set_slaves(self, sub_domain: str, master_pid: str, slaves: list) -> None:
+        """
+        Replace the slaves of a master workspace.
+
+        :param sub_domain: organization sub-domain in GoodData
+        :param master_pid: ID of the master workspace
+        :param slaves: list of {'slave_pid', 'tag', 'categories'}
+        """
+        with self.connection:
+            self._set_slaves(sub_domain, master_pid, slaves)
+
+    def delete_master(self, sub_domain: str, master_pid: str) -> None:
+        """
+        Remove a master workspace and all its slaves.
+        """
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM workspaces WHERE sub_domain = ? AND master_pid = ?',
+                (sub_domain, master_pid)
+            )
+
+    def import_json(self, data: dict) -> None:
+        """
+        Load the content of a config_sync.json file, in one transaction.
+        Masters found in data get their slaves replaced, other masters
+        are left untouched.
+
+        :param data: {'workspaces': [task, ...]}
+        """
+        with self.connection:
+            for task in data.get('workspaces', []):
+                self._set_slaves(task['sub_domain'], task['master_pid'],
+                                 task['slaves'])
+
+    def export_json(self) -> dict:
+        """
+        :return: the whole configuration in the config_sync.json format
+        """
+        return {'workspaces': self.select()}
+
+    def select(self,
+               sub_domains: tuple = (),
+               masters: tuple = (),
+               slaves: tuple = (),
+               tags: tuple = ()) -> list:
+        """
+        Sync tasks matching all of the given selectors. An empty selector
+        matches everything.
+
+        :param sub_domains: organization sub-domains
+        :param masters: IDs of master workspaces
+        :param slaves: IDs of slave workspaces
+        :param tags: tags of the synced objects
+        :return: list of tasks, with only the matching slaves. Masters
+        without slaves are only returned when no slave or tag is selected.
+        """
+        where = []
+        params = []
+        for column, values in (('s.sub_domain', sub_domains),
+                               ('s.master_pid', masters),
+                               ('s.slave_pid', slaves),
+                               ('s.tag', tags)):
+            if values:
+                where.append('%s IN (%s)' % (
+                    column, ', '.join('?' * len(values))))
+                params.extend(values)
+
+        query = (
+            'SELECT s.sub_domain, s.master_pid, s.slave_pid, s.tag, '
+            's.categories FROM slaves s %s '
+            'ORDER BY s.sub_domain, s.master_pid, s.slave_pid, s.tag' % (
+                'WHERE ' + ' AND '.join(where) if where else '')
+        )
+
+        tasks = {}
+        for sub_domain, master_pid, slave_pid, tag, categories in \
+                self.connection.execute(query, params):
+            task = tasks.setdefault((sub_domain, master_pid), {
+                'master_pid': master_pid,
+                'sub_domain': sub_domain,
+                'slaves': []
+            })
+            task['slaves'].append({
+                'slave_pid': slave_pid,
+                'tag': tag,
+                'categories': json.loads(categories)
+            })
+
+        if not slaves and not tags:
+            for sub_domain, master_pid in self._masters_without_slaves(
+                    sub_domains, masters):
+                tasks[(sub_domain, master_pid)] = {
+                    'master_pid': master_pid,
+                    'sub_domain': sub_domain,
+                    'slaves': []
+                }
+
+        return [tasks[key] for key in sorted(tasks)]
+
+    def _masters_without_slaves(self,
+                                sub_domains: tuple,
+                                masters: tuple) -> list:
+        where = [
+            'NOT EXISTS (SELECT 1 FROM slaves s WHERE '
+            's.sub_domain = w.sub_domain AND s.master_pid = w.master_pid)'
+        ]
+        params = []
+        for column, values in (('w.sub_domain', sub_domains),
+                               ('w.master_pid', masters)):
+            if values:
+                where.append('%s IN (%s)' % (
+                    column, ', '.join('?' * len(values))))
+                params.extend(values)
+
+        query = 'SELECT w.sub_domain, w.master_pid FROM workspaces w ' \
+                'WHERE ' + ' AND '.join(where)
+        return self.connection.execute(query, params).fetchall()
@@ -0,0 +1,40 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .client import GreyPoupon
+
+
+def export_raw_reports(client: GreyPoupon,
+                       project_id: str,
+                       reports: dict,
+                       max_workers: int = 4,
+                       poll_interval: int = 5) -> dict:
+    """
+    Export several reports as raw CSV files at once.
+
+    :param client: GreyPoupon connection to GoodData API
+    :param project_id: ID of the project where the reports live
+    :param reports: mapping of report uri -> path to CSV file
+    :param max_workers: maximum number of exports running at the same time
+    :param poll_interval: seconds to wait between polls of an export
+    :return: mapping of report uri -> path to downloaded CSV file
+    """
+    done = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                client.export_raw_report,
+                project_id=project_id,
+                report_uri=report_uri,
+                download_path=download_path,
+                poll_interval=poll_interval
+            ): report_uri
+            for report_uri, download_path in reports.items()
+        }
+        for future in as_completed(futures):
+            report_uri = futures[future]
+            done[report_uri] = future.result()
+            logging.info('Raw export of %s saved in %s' % (
+                report_uri, done[report_uri]))
+
+    return done
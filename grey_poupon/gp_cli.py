@@ -2,12 +2,18 @@ import os
 import sys
 import json
 import getpass
+import cProfile
 import click
-from grey_poupon import GreyPoupon, sync_metrics
+from datetime import datetime
+from grey_poupon import GreyPoupon, sync_objects
+from grey_poupon.client import QUERY_RESOURCES
+from grey_poupon.config_store import ConfigStore
+from grey_poupon.tracing import tracer
 
 CONFIG_PATH = os.path.join(os.getenv('HOME'), '.config', 'grey_poupon')
 LOGIN_FILE = os.path.join(CONFIG_PATH, 'login.json')
 CONFIG_SYNC = os.path.join(CONFIG_PATH, 'config_sync.json')
+CONFIG_DB = os.path.join(CONFIG_PATH, 'config_sync.db')
 
 
 def read_login_file():
@@ -84,12 +90,37 @@ def read_config_sync_file():
     return default
 
 
-def write_config_sync_file(data):
-    if not os.path.exists(CONFIG_SYNC):
-        os.makedirs(CONFIG_PATH)
+def open_config_store():
+    """
+    Open the sync configuration database. The first time, the content of
+    an existing config_sync.json is imported into it.
+    """
+    os.makedirs(CONFIG_PATH, exist_ok=True)
+    store = ConfigStore(CONFIG_DB)
+
+    if store.is_empty() and os.path.exists(CONFIG_SYNC):
+        print('Importing %s into %s' % (CONFIG_SYNC, CONFIG_DB))
+        store.import_json(read_config_sync_file())
+
+    return store
+
+
+def import_config_file(path):
+    with open(path) as config_file:
+        data = json.load(config_file)
 
-    with open(CONFIG_SYNC, 'w') as config_file:
-        json.dump(data, config_file)
+    store = open_config_store()
+    store.import_json(data)
+    store.close()
+
+
+def export_config_file(path):
+    store = open_config_store()
+    data = store.export_json()
+    store.close()
+
+    with open(path, 'w') as config_file:
+        json.dump(data, config_file, indent=2)
 
 
 def config_sync():
@@ -102,8 +133,21 @@ def config_sync():
     while add_another_slave:
         slave = input('ID of the slave workspace: ')
         tag = input('Tag for metrics what should be updated in the slave workspace: ')
-
-        slaves.append({'slave_pid': slave, 'tag': tag})
+        categories = None
+        while categories is None:
+            categories = input('Categories of objects to sync, comma separated %s [metric]: '
+                               % ', '.join(QUERY_RESOURCES.keys()))
+            categories = [c.strip() for c in categories.split(',') if c.strip()]
+            unknown = [c for c in categories if c not in QUERY_RESOURCES]
+            if unknown:
+                print('Unknown categories: %s' % ', '.join(unknown))
+                categories = None
+
+        slaves.append({
+            'slave_pid': slave,
+            'tag': tag,
+            'categories': categories or ['metric']
+        })
 
         next = input('Add another slave workspace? [y/n]: ')
         if next in ('y', 'Y', 'YES', 'yes'):
@@ -111,54 +155,109 @@ def config_sync():
         else:
             add_another_slave = False
 
-    config_file = read_config_sync_file()
-    tasks = config_file['workspaces']
-
-    if tasks:
-        for task in tasks:
-            if task['master_pid'] == master and task['sub_domain'] == org_domain:
-                task['slaves'] = slaves
-                slaves = list()
-                break
-    if slaves:
-        tasks.append({
-            'master_pid': master,
-            'sub_domain': org_domain,
-            'slaves': slaves
-        })
-
-    config_file['workspaces'] = tasks
-    write_config_sync_file(config_file)
+    store = open_config_store()
+    store.set_slaves(sub_domain=org_domain, master_pid=master, slaves=slaves)
+    store.close()
 
 
-def sync_metrics_using_config_file():
+def sync_metrics_using_config_file(sub_domains=(), masters=(), slaves=(), tags=()):
     logins = read_login_file()
-    configs = read_config_sync_file()
-
-    for task in configs['workspaces']:
+    store = open_config_store()
+    tasks = store.select(
+        sub_domains=sub_domains,
+        masters=masters,
+        slaves=slaves,
+        tags=tags
+    )
+    store.close()
+
+    for task in tasks:
+        for slave in task['slaves']:
+            unknown = [c for c in slave.get('categories', ['metric'])
+                       if c not in QUERY_RESOURCES]
+            if unknown:
+                raise click.ClickException(
+                    'Unknown categories %s configured for slave %s.' % (
+                        ', '.join(unknown), slave['slave_pid']))
+
+    clients = {}
+    for task in tasks:
         sst = logins['tokens'].get(task['sub_domain'], None)
         if sst:
-            client = GreyPoupon(sub_domain=task['sub_domain'], sst=sst)
+            if task['sub_domain'] not in clients:
+                with tracer.span('cli.auth', sub_domain=task['sub_domain']):
+                    clients[task['sub_domain']] = GreyPoupon(
+                        sub_domain=task['sub_domain'], sst=sst)
+            client = clients[task['sub_domain']]
             for slave in task['slaves']:
-                print('Sync %s -> %s with tag %s' % (task['master_pid'], slave['slave_pid'], slave['tag']))
-                sync_metrics(
+                categories = slave.get('categories', ['metric'])
+                print('Sync %s -> %s with tag %s (%s)' % (
+                    task['master_pid'], slave['slave_pid'], slave['tag'],
+                    ', '.join(categories)))
+                sync_objects(
                     client=client,
                     master_pid=task['master_pid'],
                     slave_pid=slave['slave_pid'],
-                    tag=slave['tag']
+                    tag=slave['tag'],
+                    categories=tuple(categories)
                 )
 
 
+def profile(func, *args):
+    """
+    Run func with tracing and cProfile enabled. The Chrome trace and the
+    cProfile dump are written into the current directory.
+    """
+    name = 'gp_%s' % datetime.now().strftime('%Y%m%d_%H%M%S')
+    profiler = cProfile.Profile()
+    tracer.enable()
+    profiler.enable()
+    try:
+        func(*args)
+    finally:
+        profiler.disable()
+        tracer.disable()
+        tracer.dump(name + '.trace.json')
+        profiler.dump_stats(name + '.prof')
+        print('Trace saved in %s.trace.json, profile saved in %s.prof' % (
+            name, name))
+
+
 @click.command()
 @click.option('--auth', is_flag=True, help='Create login configuration file.')
 @click.option('--config', is_flag=True, help='Create sync metrics configuration file.')
 @click.option('--sync', is_flag=True, help='Sync metrics.')
-def gp_cli(auth, config, sync):
+@click.option('--sub-domain', 'sub_domains', multiple=True,
+              help='Only sync workspaces of this sub-domain. Repeatable.')
+@click.option('--master', 'masters', multiple=True,
+              help='Only sync this master workspace. Repeatable.')
+@click.option('--slave', 'slaves', multiple=True,
+              help='Only sync this slave workspace. Repeatable.')
+@click.option('--tag', 'tags', multiple=True,
+              help='Only sync slaves configured with this tag. Repeatable.')
+@click.option('--profile', 'profile_run', is_flag=True,
+              help='Write a Chrome trace and a cProfile dump of the sync.')
+@click.option('--import-config', type=click.Path(exists=True),
+              help='Load sync configuration from a JSON file.')
+@click.option('--export-config', type=click.Path(),
+              help='Save sync configuration into a JSON file.')
+def gp_cli(auth, config, sync, sub_domains, masters, slaves, tags,
+           profile_run, import_config, export_config):
     if auth:
         authenticate()
 
+    if import_config:
+        import_config_file(import_config)
+
     if config:
         config_sync()
 
+    if export_config:
+        export_config_file(export_config)
+
     if sync:
-        sync_metrics_using_config_file()
+        selectors = (sub_domains, masters, slaves, tags)
+        if profile_run:
+            profile(sync_metrics_using_config_file, *selectors)
+        else:
+            sync_metrics_using_config_file(*selectors)
@@ -0,0 +1,390 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from datetime import datetime
+from .client import GreyPoupon, QUERY_RESOURCES
+from .tracing import traced, tracer
+from .sync_projects import DELETE_ORDER, NOT_DELETABLE
+
+CHAIN = 'chain.json'
+OBJECTS = 'objects'
+
+# dependencies first: reports use metrics, dashboards use reports
+RESTORE_ORDER = ('attribute', 'metric', 'report', 'projectDashboard')
+
+
+class BackupExpired(Exception):
+    def __init__(self, backup_id, status_uri):
+        self.backup_id = backup_id
+        self.message = "Import of backup %s failed (%s), its export " \
+                       "artifact is probably expired. Backups can still be " \
+                       "restored into the backed up project itself." % (
+                           backup_id, status_uri)
+
+
+def _read_chain(backup_dir: str) -> dict:
+    path = os.path.join(backup_dir, CHAIN)
+    if os.path.exists(path):
+        with open(path) as chain_file:
+            return json.load(chain_file)
+    return {'backups': []}
+
+
+def _write_chain(backup_dir: str, chain: dict) -> None:
+    path = os.path.join(backup_dir, CHAIN)
+    with open(path + '.tmp', 'w') as chain_file:
+        json.dump(chain, chain_file, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _content(definition: dict) -> tuple:
+    """
+    Object definition without its "updated" timestamp, serialized,
+    and the sha256 checksum of it.
+    """
+    content = {}
+    for category, obj in definition.items():
+        meta = {k: v for k, v in obj.get('meta', {}).items() if k != 'updated'}
+        content[category] = dict(obj, meta=meta)
+    data = json.dumps(content, sort_keys=True).encode('utf-8')
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def _store_object(backup_dir: str, definition: dict) -> str:
+    """
+    Save an object definition under the hash of its content. Definitions
+    that only differ in their "updated" timestamp are stored once.
+    """
+    data, sha256 = _content(definition)
+
+    path = os.path.join(backup_dir, OBJECTS, sha256 + '.json')
+    if not os.path.exists(path):
+        with open(path + '.tmp', 'wb') as object_file:
+            object_file.write(data)
+        os.replace(path + '.tmp', path)
+
+    return sha256
+
+
+def _read_object(backup_dir: str, sha256: str) -> dict:
+    with open(os.path.join(backup_dir, OBJECTS, sha256 + '.json')) as f:
+        return json.load(f)
+
+
+def _category(backup_dir: str, obj: dict) -> str:
+    """
+    Category of a backed up object, read from its stored definition for
+    chains written before it was recorded.
+    """
+    if 'category' in obj:
+        return obj['category']
+    return next(iter(_read_object(backup_dir, obj['sha256'])))
+
+
+def _state(backups: list) -> dict:
+    """
+    Objects of the project as of the last of the given backups:
+    identifier -> {link, category, updated, sha256, backup}.
+    """
+    state = {}
+    for backup in backups:
+        if backup['kind'] == 'full':
+            state = {}
+        for identifier, obj in backup['objects'].items():
+            state[identifier] = obj
+        for identifier in backup['deleted']:
+            state.pop(identifier, None)
+    return state
+
+
+def list_backups(backup_dir: str) -> list:
+    """
+    Backups saved in backup_dir, oldest first.
+
+    :param backup_dir: directory of the backup chain
+    :return: list of (id, kind, number of objects changed)
+    """
+    return [
+        (backup['id'], backup['kind'], len(backup['exported']))
+        for backup in _read_chain(backup_dir)['backups']
+    ]
+
+
+@traced
+def backup_objects(client: GreyPoupon,
+                   project_id: str,
+                   backup_dir: str,
+                   categories: tuple = tuple(QUERY_RESOURCES.keys()),
+                   full: bool = False,
+                   poll_interval: int = 5) -> str:
+    """
+    Back up the metadata objects of a project into a local chain made of
+    a full baseline followed by deltas.
+
+    Only objects changed since the previous backup are fetched and
+    exported with a partial MD export. Object definitions are stored in
+    backup_dir by the hash of their content, so an object that did not
+    change is stored only once for all backups. A delta only looks at the
+    requested categories, objects of other categories are kept as they
+    were in the previous backups.
+
+    The definitions are enough to restore the backed up project itself.
+    Restoring into another project imports the export tokens kept in the
+    chain, which only works for as long as GoodData keeps the export
+    artifacts.
+
+    :param client: GreyPoupon connection to GoodData API
+    :param project_id: ID of the project to back up
+    :param backup_dir: directory of the backup chain
+    :param categories: metadata categories to back up, see QUERY_RESOURCES
+    :param full: start a new baseline even if the chain has one
+    :param poll_interval: seconds to wait between polls of the export
+    :return: ID of the new backup
+    """
+    os.makedirs(os.path.join(backup_dir, OBJECTS), exist_ok=True)
+    chain = _read_chain(backup_dir)
+
+    if chain.get('project_id', project_id) != project_id:
+        raise Exception('%s holds backups of project %s, not %s.' % (
+            backup_dir, chain['project_id'], project_id))
+
+    if not chain['backups']:
+        full = True
+    previous = {} if full else _state(chain['backups'])
+
+    backup_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    if backup_id in [b['id'] for b in chain['backups']]:
+        backup_id += '-%s' % len(chain['backups'])
+
+    backup = {
+        'id': backup_id,
+        'kind': 'full' if full else 'delta',
+        'categories': list(categories),
+        'objects': {},
+        'exported': [],
+        'deleted': [],
+        'token': None
+    }
+
+    with tracer.span('backup.diff', project_id=project_id):
+        current = {}
+        for obj in client.list_objects(project_id=project_id,
+                                       categories=categories):
+            identifier = obj['identifier']
+            current[identifier] = obj
+
+            known = previous.get(identifier)
+            if known and known['updated'] == obj['updated']:
+                continue
+
+            sha256 = _store_object(
+                backup_dir, client.get_object(object_uri=obj['link']))
+            backup['objects'][identifier] = {
+                'link': obj['link'],
+                'category': obj['category'],
+                'updated': obj['updated'],
+                'sha256': sha256,
+                'backup': backup['id']
+            }
+            if not known or known['sha256'] != sha256:
+                backup['exported'].append(identifier)
+            else:
+                # only the timestamp moved, keep pointing to the old export
+                backup['objects'][identifier]['backup'] = known['backup']
+
+        backup['deleted'] = [
+            identifier for identifier, obj in previous.items()
+            if identifier not in current
+            and _category(backup_dir, obj) in categories
+        ]
+
+    if backup['exported']:
+        status_uri, token = client.export_objects(
+            project_id=project_id,
+            object_uris=[backup['objects'][i]['link']
+                         for i in backup['exported']]
+        )
+        with tracer.span('backup.export_wait', project_id=project_id):
+            while not client.is_export_done(status_uri=status_uri):
+                logging.info('Waiting for export to finish ...')
+                time.sleep(poll_interval)
+        backup['token'] = token
+
+    chain['project_id'] = project_id
+    chain['backups'].append(backup)
+    _write_chain(backup_dir, chain)
+
+    logging.info('%s backup %s of %s: %s changed, %s deleted objects' % (
+        backup['kind'], backup['id'], project_id,
+        len(backup['exported']), len(backup['deleted'])))
+
+    return backup['id']
+
+
+def _rebuild(client: GreyPoupon,
+             backup_dir: str,
+             project_id: str,
+             state: dict,
+             categories: tuple) -> None:
+    """
+    Write the stored definitions back into the backed up project: changed
+    objects are overwritten, deleted ones are created again.
+    """
+    current = {
+        obj['identifier']: obj for obj in client.list_objects(
+            project_id=project_id, categories=categories)
+    }
+
+    objects = []
+    for identifier, obj in state.items():
+        definition = _read_object(backup_dir, obj['sha256'])
+        category = next(iter(definition))
+        order = RESTORE_ORDER.index(category) \
+            if category in RESTORE_ORDER else len(RESTORE_ORDER)
+        objects.append((order, identifier, obj, category, definition))
+    objects.sort(key=lambda o: o[:2])
+
+    # uris of objects created again, to fix the references to them
+    created = {}
+
+    for _, identifier, obj, category, definition in objects:
+        now = current.get(identifier)
+        if now and now['updated'] == obj['updated']:
+            continue
+        if now and _content(client.get_object(now['link']))[1] == obj['sha256']:
+            continue
+
+        if category in NOT_DELETABLE and not now:
+            logging.warning('%s %s cannot be created from metadata, '
+                            'skipped' % (category, identifier))
+            continue
+
+        text = json.dumps(definition)
+        for old_uri, new_uri in created.items():
+            text = text.replace('"%s"' % old_uri, '"%s"' % new_uri) \
+                .replace('[%s]' % old_uri, '[%s]' % new_uri)
+        definition = json.loads(text)
+
+        if now:
+            definition[category]['meta']['uri'] = now['link']
+            client.update_object(object_uri=now['link'], definition=definition)
+        else:
+            definition[category]['meta'].pop('uri', None)
+            created[obj['link']] = client.create_object(
+                project_id=project_id, definition=definition)
+
+
+def _replay(client: GreyPoupon,
+            target_pid: str,
+            backups: list,
+            state: dict,
+            poll_interval: int) -> None:
+    """
+    Import the export tokens of the chain into the target project, in
+    order, skipping backups whose objects were all replaced later.
+    """
+    needed = {obj['backup'] for obj in state.values()}
+
+    for backup in backups:
+        if backup['id'] not in needed or not backup['token']:
+            continue
+
+        logging.info('Importing backup %s into %s' % (backup['id'], target_pid))
+        status_uri = client.import_objects(
+            project_id=target_pid,
+            token=backup['token']
+        )
+        with tracer.span('restore.import_wait', backup=backup['id']):
+            while True:
+                status = client.get_task_status(status_uri=status_uri)
+                if status in ('OK', 'WARNING'):
+                    break
+                if status == 'ERROR':
+                    raise BackupExpired(backup['id'], status_uri)
+                logging.info('Waiting for import to finish ...')
+                time.sleep(poll_interval)
+
+
+@traced
+def restore_objects(client: GreyPoupon,
+                    backup_dir: str,
+                    target_pid: str,
+                    until: str = None,
+                    prune: bool = False,
+                    poll_interval: int = 5) -> None:
+    """
+    Restore the metadata objects of a project, as they were at a given
+    backup, into a target project.
+
+    Into the backed up project itself, objects are rebuilt from the
+    definitions stored in backup_dir: changed objects are overwritten
+    and deleted ones created again, without any GoodData export.
+
+    Into another project, the baseline and the deltas up to the requested
+    backup are imported in order with import_objects, each newer version
+    overwriting the older one. This needs the export artifacts to still
+    exist on GoodData, BackupExpired is raised otherwise.
+
+    In both cases objects recorded in the chain that did not exist at
+    that point in time are deleted from the target project.
+
+    :param client: GreyPoupon connection to GoodData API
+    :param backup_dir: directory of the backup chain
+    :param target_pid: ID of the project where to restore the objects
+    :param until: ID of the backup to restore, defaults to the latest one
+    :param prune: also delete every other object of the backed up
+    categories that did not exist at that point in time from the
+    target project
+    :param poll_interval: seconds to wait between polls of the import
+    """
+    chain = _read_chain(backup_dir)
+    backups = chain['backups']
+    if until:
+        ids = [backup['id'] for backup in backups]
+        if until not in ids:
+            raise Exception('No backup %s in %s.' % (until, backup_dir))
+        backups = backups[:ids.index(until) + 1]
+    if not backups:
+        raise Exception('No backups in %s.' % backup_dir)
+
+    start = max(i for i, backup in enumerate(backups)
+                if backup['kind'] == 'full')
+    backups = backups[start:]
+    state = _state(backups)
+    categories = tuple(sorted({
+        category for backup in backups for category in backup['categories']
+    }))
+
+    if target_pid == chain['project_id']:
+        _rebuild(client, backup_dir, target_pid, state, categories)
+    else:
+        _replay(client, target_pid, backups, state, poll_interval)
+
+    known = {
+        identifier for backup in chain['backups']
+        for identifier in backup['objects']
+    }
+    client.clear_cache()
+    extra = [
+        obj for obj in client.list_objects(
+            project_id=target_pid, categories=categories)
+        if obj['identifier'] not in state
+        and obj['category'] not in NOT_DELETABLE
+        and (prune or obj['identifier'] in known)
+    ]
+    extra.sort(key=lambda obj: DELETE_ORDER.index(obj['category'])
+               if obj['category'] in DELETE_ORDER else len(DELETE_ORDER))
+    extra = [obj['link'] for obj in extra]
+
+    if extra:
+        logging.warning('Following objects will be deleted from the %s '
+                        'project: %s' % (target_pid, ', '.join(extra)))
+        not_deleted = client.delete_objects(
+            project_id=target_pid, object_uris=extra)
+        if not_deleted:
+            raise Exception('Restore of %s incomplete, could not delete: '
+                            '%s' % (target_pid, ', '.join(not_deleted)))
+
+    logging.info('Restore done.')
@@ -0,0 +1,283 @@
+import os
+import json
+import logging
+import threading
+from collections import deque
+from datetime import date
+from .client import GreyPoupon
+from .tracing import tracer
+
+
+class ProjectPool(object):
+    """
+    Keeps a number of empty, ENABLED projects ready for every
+    (environment, driver) pair, so backups and clones do not have to
+    wait for a new project to be created.
+
+    Projects are created by a background thread, which refills the pool
+    every time a project is handed out. When the pool of a pair is empty,
+    acquire() falls back to creating the project on the spot.
+
+    Without state_path the pool lives in memory only, so it only helps
+    long-lived processes, and projects still in the pool when the process
+    exits without close() are left behind. With state_path, the IDs of
+    ready and still-being-created projects are saved in that JSON file
+    and picked up by the next pool using it, e.g. the next gp run.
+
+    Use:
+        pool = ProjectPool(client, create_project_token, size=2,
+                           state_path='pool.json')
+        bkp_pid = client.backup_project(pid, token, pool=pool)
+        pool.close(delete_idle=False)
+    """
+
+    def __init__(self,
+                 client: GreyPoupon,
+                 create_project_token: str,
+                 size: int = 2,
+                 project_template: str = None,
+                 warm: tuple = (('DEVELOPMENT', 'Pg'),),
+                 state_path: str = None,
+                 retry_interval: int = 30,
+                 enable_timeout: int = 600) -> None:
+        """
+        :param client: GreyPoupon connection to GoodData API
+        :param create_project_token: authorization token for
+        creating projects
+        :param size: number of ready projects kept per (environment, driver)
+        :param project_template: uri of the template the projects are
+        created from
+        :param warm: (environment, driver) pairs to fill right away, other
+        pairs are filled once first asked for
+        :param state_path: JSON file where to keep the IDs of the pool
+        projects between runs
+        :param retry_interval: seconds to wait after a failed refill
+        :param enable_timeout: seconds to wait at most for a new project
+        to be ENABLED
+        """
+        self.client = client
+        self.create_project_token = create_project_token
+        self.size = size
+        self.project_template = project_template
+        self.state_path = state_path
+        self.retry_interval = retry_interval
+        self.enable_timeout = enable_timeout
+
+        self._ready = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._delete_idle = True
+
+        for entry in self._load():
+            key = (entry['environment'], entry['driver'])
+            if entry['state'] == 'ready':
+                self._ready.setdefault(key, deque()).append(entry['pid'])
+            else:
+                self._ready.setdefault(key, deque())
+                self._pending.append(entry)
+
+        for environment, driver in warm:
+            self._register(environment, driver)
+
+        self._worker = threading.Thread(
+            target=self._refill,
+            name='ProjectPool',
+            daemon=True
+        )
+        self._worker.start()
+
+    def _load(self) -> list:
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path) as state_file:
+                return json.load(state_file)
+        return []
+
+    def _save(self) -> None:
+        """
+        Write the pool into state_path. Must be called holding self._lock.
+        """
+        if not self.state_path:
+            return
+
+        entries = [
+            dict(entry, state='pending') for entry in self._pending
+        ] + [
+            {'pid': pid, 'environment': environment, 'driver': driver,
+             'state': 'ready'}
+            for (environment, driver), ready in self._ready.items()
+            for pid in ready
+        ]
+        with open(self.state_path + '.tmp', 'w') as state_file:
+            json.dump(entries, state_file, indent=2)
+        os.replace(self.state_path + '.tmp', self.state_path)
+
+    def _register(self, environment: str, driver: str) -> deque:
+        with self._lock:
+            key = (environment, driver)
+            if key not in self._ready:
+                self._ready[key] = deque()
+                self._wakeup.set()
+            return self._ready[key]
+
+    def _finish(self, entry: dict) -> None:
+        """
+        Wait for a created project to be ENABLED and add it to the pool.
+        """
+        try:
+            self.client.wait_for_project(
+                project_id=entry['pid'],
+                timeout=self.enable_timeout
+            )
+            enabled = True
+        except Exception as e:
+            logging.warning('Pool project %s dropped: %s' % (entry['pid'], e))
+            enabled = False
+
+        with self._lock:
+            self._pending.remove(entry)
+            if enabled and not (self._closed and self._delete_idle):
+                key = (entry['environment'], entry['driver'])
+                self._ready.setdefault(key, deque()).append(entry['pid'])
+                logging.info('Project %s added to the %s/%s pool' % (
+                    entry['pid'], entry['environment'], entry['driver']))
+            self._save()
+
+        if enabled and self._closed and self._delete_idle:
+            self.client.delete_project(project_id=entry['pid'])
+
+        if not enabled:
+            raise Exception('Pool project %s not ENABLED.' % entry['pid'])
+
+    def _create(self, environment: str, driver: str) -> None:
+        pid = self.client.create_project(
+            token=self.create_project_token,
+            title='GreyPoupon pool %s %s' % (
+                environment, date.today().isoformat()),
+            db=driver,
+            environment=environment,
+            project_template=self.project_template
+        )
+        entry = {'pid': pid, 'environment': environment, 'driver': driver}
+        with self._lock:
+            self._pending.append(entry)
+            self._save()
+
+        self._finish(entry)
+
+    def _missing(self, key: tuple) -> int:
+        with self._lock:
+            pending = len([e for e in self._pending
+                           if (e['environment'], e['driver']) == key])
+            return self.size - len(self._ready[key]) - pending
+
+    def _refill(self) -> None:
+        while not self._closed:
+            self._wakeup.clear()
+            failed = False
+
+            with self._lock:
+                pending = list(self._pending)
+                keys = list(self._ready.keys())
+
+            for entry in pending:
+                try:
+                    self._finish(entry)
+                except Exception:
+                    failed = True
+
+            for environment, driver in keys:
+                while not self._closed \
+                        and self._missing((environment, driver)) > 0:
+                    try:
+                        with tracer.span('pool.refill',
+                                         environment=environment,
+                                         driver=driver):
+                            self._create(environment, driver)
+                    except Exception as e:
+                        logging.warning('Project pool refill failed: %s' % e)
+                        failed = True
+                        break
+
+            self._wakeup.wait(self.retry_interval if failed else None)
+
+    def acquire(self,
+                environment: str = 'DEVELOPMENT',
+                driver: str = 'Pg',
+                title: str = None) -> str:
+        """
+        Hand out an empty, ENABLED project.
+
+        :param environment: PRODUCTION, DEVELOPMENT, TESTING
+        :param driver: database type of the project, e.g. "Pg"
+        :param title: title given to the project
+        :return: ID of the project
+        """
+        ready = self._register(environment, driver)
+
+        with tracer.span('pool.acquire', environment=environment):
+            while True:
+                with self._lock:
+                    pid = ready.popleft() if ready else None
+                    self._save()
+                self._wakeup.set()
+
+                if pid is None:
+                    logging.warning('Project pool %s/%s is empty, creating '
+                                    'a new project' % (environment, driver))
+                    return self.client.create_ready_project(
+                        token=self.create_project_token,
+                        title=title or 'GreyPoupon %s' % environment,
+                        db=driver,
+                        environment=environment,
+                        project_template=self.project_template,
+                        timeout=self.enable_timeout
+                    )
+
+                # projects saved by an earlier run may be gone by now
+                try:
+                    state = self.client.get_project_state(pid)
+                except Exception as e:
+                    state = e
+                if state == 'ENABLED':
+                    break
+                logging.warning('Pool project %s dropped: %s' % (pid, state))
+
+            if title:
+                self.client.rename_project(project_id=pid, title=title)
+
+        return pid
+
+    def close(self, delete_idle: bool = True, timeout: int = 30) -> list:
+        """
+        Stop refilling the pool.
+
+        :param delete_idle: delete the projects still waiting in the pool.
+        If False, they are kept in state_path for the next pool.
+        :param timeout: seconds to wait for the background thread; a
+        project it is still creating is handled by the thread when ready
+        :return: IDs of the projects left in the pool (empty list
+        if they were deleted)
+        """
+        self._delete_idle = delete_idle
+        self._closed = True
+        self._wakeup.set()
+        self._worker.join(timeout)
+
+        if self._worker.is_alive():
+            logging.warning('Project pool still waiting for a new project.')
+
+        with self._lock:
+            idle = [pid for ready in self._ready.values() for pid in ready]
+            if delete_idle:
+                for ready in self._ready.values():
+                    ready.clear()
+                self._save()
+
+        if delete_idle:
+            for pid in idle:
+                self.client.delete_project(project_id=pid)
+            return []
+
+        return idle
@@ -0,0 +1,78 @@
+import time
+import threading
+
+
+class _Call(object):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical calls made at the same time: the first caller
+    runs the function, every other caller with the same key waits for
+    and gets the same result. Results can be memoised for ttl seconds.
+    """
+
+    def __init__(self, ttl: float = 0) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._cache = {}
+
+    def do(self, key, func, cacheable=lambda result: True, use_cache=True):
+        """
+        Run func once for all concurrent callers using the same key.
+
+        :param key: hashable identifier of the call
+        :param func: function without arguments to be called
+        :param cacheable: predicate telling if a result may be memoised
+        :param use_cache: False to ignore memoised results, concurrent
+        calls are still coalesced
+        :return: result of func
+        """
+        with self._lock:
+            cached = self._cache.get(key) if use_cache else None
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.ttl > 0 \
+                        and cacheable(call.result):
+                    now = time.monotonic()
+                    self._cache = {k: v for k, v in self._cache.items()
+                                   if v[0] > now}
+                    self._cache[key] = (now + self.ttl, call.result)
+            call.done.set()
+
+        return call.result
+
+    def forget(self, key=None) -> None:
+        """
+        Drop a memoised result, or all of them if key is not given.
+        """
+        with self._lock:
+            if key is None:
+                self._cache = {}
+            else:
+                self._cache.pop(key, None)
@@ -1,68 +1,147 @@
 import time
 import logging
 from .client import GreyPoupon
+from .tracing import traced, tracer
 
+# LDM objects are only updated in the slave, never deleted
+NOT_DELETABLE = ('attribute',)
 
-def sync_metrics(client: GreyPoupon,
+# dependents first: dashboards use reports, reports use metrics
+DELETE_ORDER = ('projectDashboard', 'report', 'metric')
+
+
+@traced
+def sync_objects(client: GreyPoupon,
                  master_pid: str,
                  slave_pid: str,
-                 tag: str) -> None:
+                 tag: str,
+                 categories: tuple = ('metric',)) -> None:
     """
-    Sync metric definition from a master workspace to a slave workspace.
+    Sync definitions of tagged metadata objects (metrics, reports,
+    dashboards, attributes, ...) from a master workspace to a slave
+    workspace.
+
+    Objects of all categories are collected in one listing pass and sent
+    to the slave with a single partial export and a single import, so
+    syncing more categories does not add export/import cycles.
+
+    Tagged objects of the slave missing in the master are deleted after
+    the import, dashboards before the reports and metrics they use.
 
     :param client: GreyPoupon connection to GoodData API
-    :param master_pid: workspace where metrics are up to date
-    :param slave_pid: workspace where metrics will be updated
-    :param tag: naming convention to identify metrics belonging to
+    :param master_pid: workspace where objects are up to date
+    :param slave_pid: workspace where objects will be updated
+    :param tag: naming convention to identify objects belonging to
     the slave workspace
+    :param categories: metadata categories to sync, see QUERY_RESOURCES
     """
     logging.basicConfig(level=logging.INFO)
     upsert = {}
     delete = {}
 
-    master_metrics = client.list_metrics(project_id=master_pid)
-    slave_metrics = client.list_metrics(project_id=slave_pid)
+    with tracer.span('sync.list', master_pid=master_pid, slave_pid=slave_pid):
+        master_objects = client.list_objects(
+            project_id=master_pid, categories=categories)
+        slave_objects = client.list_objects(
+            project_id=slave_pid, categories=categories)
+
+        for obj in master_objects:
+            if tag in obj['tags'].split():
+                upsert[obj['identifier']] = obj['link']
 
-    for metric in master_metrics:
-        if tag in metric['tags'].split():
-            upsert[metric['identifier']] = metric['link']
+        for obj in slave_objects:
+            if obj['category'] in NOT_DELETABLE:
+                continue
+            if tag in obj['tags'].split():
+                if obj['identifier'] not in upsert.keys():
+                    delete[obj['identifier']] = obj
 
-    for metric in slave_metrics:
-        if tag in metric['tags'].split():
-            if metric['identifier'] not in upsert.keys():
-                delete[metric['identifier']] = metric['link']
+    if upsert:
+        _upsert(client, master_pid, slave_pid, upsert)
+    else:
+        logging.info('Nothing to add or update.')
 
-    logging.warning(
-        'Following metrics will be '
-        'deleted from the %s project: %s' % (
-            slave_pid, ', '.join(delete.values())
+    # after the upsert, so objects of the slave referencing a deleted
+    # object are already updated to the master version
+    delete_uris = [
+        obj['link'] for obj in sorted(
+            delete.values(),
+            key=lambda obj: DELETE_ORDER.index(obj['category'])
+            if obj['category'] in DELETE_ORDER else len(DELETE_ORDER)
         )
-    )
+    ]
 
-    client.delete_objects(
-        project_id=master_pid,
-        object_uris=list(delete.values())
-    )
+    not_deleted = []
+    if delete_uris:
+        logging.warning(
+            'Following objects will be '
+            'deleted from the %s project: %s' % (
+                slave_pid, ', '.join(delete_uris)
+            )
+        )
+
+        with tracer.span('sync.delete', slave_pid=slave_pid,
+                         objects=len(delete)):
+            not_deleted = client.delete_objects(
+                project_id=slave_pid,
+                object_uris=delete_uris
+            )
+
+    if not_deleted:
+        raise Exception('Sync of %s incomplete, could not delete: %s' % (
+            slave_pid, ', '.join(not_deleted)))
+
+    logging.info('Sync done.')
 
+
+def _upsert(client: GreyPoupon,
+            master_pid: str,
+            slave_pid: str,
+            upsert: dict) -> None:
+    """
+    Copy objects from master to slave with one partial export/import.
+    """
     export_status_uri, token = client.export_objects(
         project_id=master_pid,
         object_uris=list(upsert.values())
     )
 
-    while not client.is_export_done(status_uri=export_status_uri):
-        logging.info('Waiting for export to finish ...')
-        time.sleep(10)
+    with tracer.span('sync.export_wait', master_pid=master_pid):
+        while not client.is_export_done(status_uri=export_status_uri):
+            logging.info('Waiting for export to finish ...')
+            time.sleep(10)
 
     logging.info(
-        'Following metrics will be added or updated in the '         
+        'Following objects will be added or updated in the '
         'following project %s from the %s master project: %s' % (
             slave_pid, master_pid, ', '.join(upsert.values())
         )
     )
     import_status_uri = client.import_objects(project_id=slave_pid, token=token)
 
-    while not client.is_export_done(status_uri=import_status_uri):
-        logging.info('Waiting for import to finish ...')
-        time.sleep(10)
+    with tracer.span('sync.import_wait', slave_pid=slave_pid):
+        while not client.is_export_done(status_uri=import_status_uri):
+            logging.info('Waiting for import to finish ...')
+            time.sleep(10)
+
+
+def sync_metrics(client: GreyPoupon,
+                 master_pid: str,
+                 slave_pid: str,
+                 tag: str) -> None:
+    """
+    Sync metric definition from a master workspace to a slave workspace.
 
-    logging.info('Sync done.')
\ No newline at end of file
+    :param client: GreyPoupon connection to GoodData API
+    :param master_pid: workspace where metrics are up to date
+    :param slave_pid: workspace where metrics will be updated
+    :param tag: naming convention to identify metrics belonging to
+    the slave workspace
+    """
+    sync_objects(
+        client=client,
+        master_pid=master_pid,
+        slave_pid=slave_pid,
+        tag=tag,
+        categories=('metric',)
+    )
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import inspect
+import threading
+import functools
+from contextlib import contextmanager
+
+
+class Tracer(object):
+    """
+    Collects timed spans and writes them as a Chrome trace
+    (chrome://tracing, https://ui.perfetto.dev).
+
+    Tracing is off by default, spans cost next to nothing until
+    enable() is called.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.events = []
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self.events = []
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """
+        Time the block of code inside the with statement.
+
+        :param name: name of the span shown in the timeline
+        :param args: extra details shown with the span
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, **args)
+
+    def record(self, name: str, start: float, duration: float, **args) -> None:
+        """
+        Add a span measured by the caller.
+
+        :param name: name of the span shown in the timeline
+        :param start: time.perf_counter() at the start of the span
+        :param duration: seconds spent in the span
+        :param args: extra details shown with the span
+        """
+        event = {
+            'name': name,
+            'cat': name.split('.')[0],
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': duration * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {k: str(v) for k, v in args.items()}
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def dump(self, path: str) -> None:
+        """
+        Write the collected spans into a Chrome trace JSON file.
+
+        :param path: path to JSON file
+        """
+        with self._lock:
+            events = list(self.events)
+
+        threads = {t.ident: t.name for t in threading.enumerate()}
+        metadata = [
+            {
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': {'name': threads.get(tid, str(tid))}
+            }
+            for tid in {event['tid'] for event in events}
+        ]
+
+        with open(path, 'w') as trace_file:
+            json.dump({
+                'traceEvents': metadata + events,
+                'displayTimeUnit': 'ms'
+            }, trace_file)
+
+
+tracer = Tracer()
+
+
+def traced(func):
+    """
+    Decorator recording every call of func as a span named after it.
+    For generators the span only sums the time spent producing items,
+    not the time the consumer spends between them.
+    """
+    name = '%s.%s' % (func.__module__.split('.')[-1], func.__qualname__)
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return (yield from func(*args, **kwargs))
+
+            generator = func(*args, **kwargs)
+            start = time.perf_counter()
+            busy = 0.0
+            try:
+                while True:
+                    resumed = time.perf_counter()
+                    try:
+                        item = next(generator)
+                    except StopIteration as stop:
+                        return stop.value
+                    finally:
+                        busy += time.perf_counter() - resumed
+                    yield item
+            finally:
+                generator.close()
+                tracer.record(name, start, busy)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import zipfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from .client import GreyPoupon
+
+UPLOAD_INFO = 'upload_info.json'
+UPLOAD_ZIP = 'upload.zip'
+
+
+class UploadVerificationFailed(Exception):
+    def __init__(self, remote_path, expected, actual):
+        self.remote_path = remote_path
+        self.message = "Uploaded file %s is %s, expected %s." % (
+            remote_path, actual, expected)
+
+
+def _sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def prepare_upload(paths: list,
+                   upload_info: dict,
+                   work_dir: str,
+                   compress: bool = False) -> tuple:
+    """
+    Lay out the files of a data load the way the pull ETL expects them:
+    the CSV files plus upload_info.json, or all of them packed into a
+    single upload.zip.
+
+    :param paths: CSV files to be loaded
+    :param upload_info: content of upload_info.json (the SLI manifest)
+    :param work_dir: directory where to write upload_info.json
+    and upload.zip
+    :param compress: pack everything into upload.zip
+    :return: list of files to upload, each {'name', 'path', 'size',
+    'sha256'}, and the sha256 checksum of the whole upload
+    """
+    names = [os.path.basename(path) for path in paths]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if UPLOAD_INFO in names:
+        duplicates.append(UPLOAD_INFO)
+    if duplicates:
+        raise Exception('Files to load must have unique names, '
+                        'got more than one %s.' % ', '.join(duplicates))
+
+    os.makedirs(work_dir, exist_ok=True)
+
+    info_path = os.path.join(work_dir, UPLOAD_INFO)
+    with open(info_path, 'w') as info_file:
+        json.dump(upload_info, info_file, sort_keys=True)
+
+    sources = [(UPLOAD_INFO, info_path)] + [
+        (os.path.basename(path), path) for path in paths
+    ]
+
+    checksum = hashlib.sha256()
+    for name, path in sources:
+        checksum.update(('%s %s\n' % (name, _sha256(path))).encode('utf-8'))
+    checksum.update(b'zip' if compress else b'csv')
+
+    if compress:
+        zip_path = os.path.join(work_dir, UPLOAD_ZIP)
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, path in sources:
+                archive.write(path, arcname=name)
+        sources = [(UPLOAD_ZIP, zip_path)]
+
+    files = [
+        {'name': name, 'path': path, 'size': os.path.getsize(path),
+         'sha256': _sha256(path)}
+        for name, path in sources
+    ]
+    return files, checksum.hexdigest()
+
+
+def upload_files(client: GreyPoupon,
+                 files: list,
+                 remote_dir: str,
+                 max_workers: int = 4) -> None:
+    """
+    Upload files into a directory of the user staging area, several
+    at once.
+
+    A file already present with the expected size and sha256 checksum,
+    left by an interrupted earlier run, is skipped. Every uploaded file is
+    read back from the staging area and its size and checksum verified.
+    WebDAV gives no checksums, so verifying reads every file once more.
+
+    :param client: GreyPoupon connection to GoodData API
+    :param files: files to upload, see prepare_upload
+    :param remote_dir: directory in the staging area
+    :param max_workers: maximum number of files uploaded at the same time
+    """
+    client.make_staging_dir(remote_dir)
+
+    def upload(f):
+        remote_path = '%s/%s' % (remote_dir, f['name'])
+
+        if client.get_staging_file_size(remote_path) == f['size'] \
+                and client.get_staging_file_sha256(remote_path) == f['sha256']:
+            logging.info('%s already uploaded' % remote_path)
+            return
+
+        client.upload_to_staging(f['path'], remote_path)
+
+        size = client.get_staging_file_size(remote_path)
+        if size != f['size']:
+            raise UploadVerificationFailed(
+                remote_path, '%s bytes' % f['size'], '%s bytes' % size)
+        sha256 = client.get_staging_file_sha256(remote_path)
+        if sha256 != f['sha256']:
+            raise UploadVerificationFailed(
+                remote_path, 'sha256 %s' % f['sha256'], 'sha256 %s' % sha256)
+        logging.info('%s uploaded' % remote_path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in executor.map(upload, files):
+            pass
+
+
+def load_data(client: GreyPoupon,
+              project_id: str,
+              paths: list,
+              upload_info: dict,
+              remote_prefix: str = 'grey_poupon',
+              work_dir: str = None,
+              compress: bool = False,
+              max_workers: int = 4,
+              poll_interval: int = 10) -> str:
+    """
+    Upload CSV files with their upload_info.json into the user staging
+    area, then run the data load of the uploaded directory and wait for
+    it to finish.
+
+    Files are uploaded in parallel, or as one upload.zip if compress
+    is set. The staging directory is named after the checksum of the
+    upload, "<remote_prefix>-<sha256>", so running the same load again
+    resumes the upload instead of starting over.
+
+    :param client: GreyPoupon connection to GoodData API
+    :param project_id: ID of the project where to load the data
+    :param paths: CSV files to be loaded
+    :param upload_info: content of upload_info.json (the SLI manifest)
+    :param remote_prefix: prefix of the directory in the staging area
+    :param work_dir: directory where to keep upload_info.json and
+    upload.zip, defaults to a temporary directory
+    :param compress: upload a single upload.zip instead of the files
+    :param max_workers: maximum number of files uploaded at the same time
+    :param poll_interval: seconds to wait between polls of the data load
+    :return: directory in the staging area
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files, checksum = prepare_upload(
+            paths=paths,
+            upload_info=upload_info,
+            work_dir=work_dir or tmp_dir,
+            compress=compress
+        )
+        remote_dir = '%s-%s' % (remote_prefix, checksum[:32])
+
+        upload_files(
+            client=client,
+            files=files,
+            remote_dir=remote_dir,
+            max_workers=max_workers
+        )
+
+    poll_uri = client.start_data_load(
+        project_id=project_id,
+        directory=remote_dir
+    )
+
+    while not client.is_data_load_done(poll_uri):
+        logging.info('Waiting for data load to finish ...')
+        time.sleep(poll_interval)
+
+    logging.info('Data load done.')
+    return remote_dir
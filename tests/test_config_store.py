@@ -0,0 +1,53 @@
+from grey_poupon.config_store import ConfigStore
+
+CONFIG = {'workspaces': [
+    {'sub_domain': 'a', 'master_pid': 'm1', 'slaves': [
+        {'slave_pid': 's1', 'tag': 't1', 'categories': ['metric']},
+        {'slave_pid': 's2', 'tag': 't2', 'categories': ['metric', 'report']},
+    ]},
+    {'sub_domain': 'a', 'master_pid': 'm2', 'slaves': []},
+    {'sub_domain': 'b', 'master_pid': 'm3', 'slaves': [
+        {'slave_pid': 's3', 'tag': 't1', 'categories': ['metric']},
+    ]},
+]}
+
+
+def store():
+    config_store = ConfigStore(':memory:')
+    config_store.import_json(CONFIG)
+    return config_store
+
+
+def test_json_round_trip_keeps_masters_without_slaves():
+    assert store().export_json() == CONFIG
+
+
+def test_select():
+    config_store = store()
+
+    tasks = config_store.select(tags=('t1',))
+    assert [(t['master_pid'], [s['slave_pid'] for s in t['slaves']])
+            for t in tasks] == [('m1', ['s1']), ('m3', ['s3'])]
+
+    tasks = config_store.select(masters=('m1',), slaves=('s2',))
+    assert tasks == [{'sub_domain': 'a', 'master_pid': 'm1', 'slaves': [
+        {'slave_pid': 's2', 'tag': 't2', 'categories': ['metric', 'report']}]}]
+
+    assert [t['master_pid'] for t in config_store.select(sub_domains=('a',))] \
+        == ['m1', 'm2']
+
+
+def test_selectors_use_indexes():
+    connection = store().connection
+    for column in ('master_pid', 'slave_pid', 'tag'):
+        plan = connection.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM slaves s '
+            'WHERE s.%s IN (?)' % column, ('x',)).fetchall()
+        assert 'SCAN' not in ' '.join(row[-1] for row in plan)
+
+
+def test_set_slaves_replaces_slaves():
+    config_store = store()
+    config_store.set_slaves('a', 'm1', [{'slave_pid': 's9', 'tag': 't9'}])
+    assert config_store.select(masters=('m1',))[0]['slaves'] == [
+        {'slave_pid': 's9', 'tag': 't9', 'categories': ['metric']}]
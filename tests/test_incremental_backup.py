@@ -0,0 +1,162 @@
+import json
+
+import pytest
+
+from grey_poupon.incremental_backup import (
+    BackupExpired, backup_objects, list_backups, restore_objects
+)
+
+
+class FakeProject(object):
+    """
+    In-memory stand-in for the metadata API of GoodData projects.
+    """
+
+    def __init__(self):
+        self.projects = {'src': {}, 'dst': {}}
+        self.clock = 0
+        self.exports = {}
+        self.imports = []
+        self.expired = set()
+
+    def put(self, pid, identifier, content, category='metric'):
+        self.clock += 1
+        objects = self.projects[pid]
+        link = objects[identifier]['link'] if identifier in objects else \
+            '/gdc/md/%s/obj/%s' % (pid, self.clock)
+        objects[identifier] = {
+            'identifier': identifier, 'link': link, 'category': category,
+            'updated': str(self.clock), 'tags': '', 'content': content
+        }
+
+    def list_objects(self, project_id, categories):
+        return [dict(o) for o in self.projects[project_id].values()
+                if o['category'] in categories]
+
+    def _find(self, uri):
+        for objects in self.projects.values():
+            for obj in objects.values():
+                if obj['link'] == uri:
+                    return obj
+
+    def get_object(self, object_uri):
+        obj = self._find(object_uri)
+        return {obj['category']: {
+            'meta': {'identifier': obj['identifier'], 'uri': obj['link'],
+                     'updated': obj['updated']},
+            'content': obj['content']}}
+
+    def export_objects(self, project_id, object_uris):
+        token = 'token%s' % len(self.exports)
+        self.exports[token] = [dict(self._find(uri)) for uri in object_uris]
+        return '/status/export', token
+
+    def is_export_done(self, status_uri):
+        return True
+
+    def import_objects(self, project_id, token):
+        self.imports.append(token)
+        if token in self.expired:
+            return '/status/error'
+        for obj in self.exports[token]:
+            self.put(project_id, obj['identifier'], obj['content'],
+                     obj['category'])
+        return '/status/ok'
+
+    def get_task_status(self, status_uri):
+        return 'ERROR' if status_uri == '/status/error' else 'OK'
+
+    def update_object(self, object_uri, definition):
+        category, obj = next(iter(definition.items()))
+        self.put('src', obj['meta']['identifier'], obj['content'], category)
+
+    def create_object(self, project_id, definition):
+        category, obj = next(iter(definition.items()))
+        self.put(project_id, obj['meta']['identifier'], obj['content'],
+                 category)
+        return self.projects[project_id][obj['meta']['identifier']]['link']
+
+    def delete_objects(self, project_id, object_uris):
+        for identifier, obj in list(self.projects[project_id].items()):
+            if obj['link'] in object_uris:
+                del self.projects[project_id][identifier]
+        return []
+
+    def clear_cache(self):
+        pass
+
+    def contents(self, pid):
+        return {i: o['content'] for i, o in self.projects[pid].items()}
+
+
+@pytest.fixture
+def api():
+    api = FakeProject()
+    api.put('src', 'm1', {'expression': 'SELECT 1'})
+    api.put('src', 'm2', {'expression': 'SELECT 2'})
+    return api
+
+
+def test_deltas_only_export_changed_objects(api, tmp_path):
+    first = backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+    api.put('src', 'm1', {'expression': 'SELECT 10'})
+    api.put('src', 'm2', {'expression': 'SELECT 2'})  # touched, same content
+    second = backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+
+    assert first != second
+    assert list_backups(str(tmp_path)) == [
+        (first, 'full', 2), (second, 'delta', 1)]
+    assert [o['identifier'] for o in api.exports['token1']] == ['m1']
+    assert len(list((tmp_path / 'objects').iterdir())) == 3
+
+
+def test_delta_of_fewer_categories_keeps_other_objects(api, tmp_path):
+    api.put('src', 'r1', {'grid': 'm1'}, category='report')
+    backup_objects(api, 'src', str(tmp_path), categories=('metric', 'report'))
+    api.put('src', 'm1', {'expression': 'SELECT 10'})
+    backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+
+    chain = json.loads((tmp_path / 'chain.json').read_text())
+    assert chain['backups'][-1]['deleted'] == []
+
+    del api.projects['src']['m2']
+    del api.projects['src']['r1']
+    restore_objects(api, str(tmp_path), 'src')
+
+    assert api.contents('src') == {
+        'm1': {'expression': 'SELECT 10'}, 'm2': {'expression': 'SELECT 2'},
+        'r1': {'grid': 'm1'}}
+
+
+def test_restore_into_source_uses_local_definitions(api, tmp_path):
+    first = backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+    api.put('src', 'm1', {'expression': 'SELECT 10'})
+    del api.projects['src']['m2']
+    api.put('src', 'm3', {'expression': 'SELECT 3'})
+    backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+    api.expired = set(api.exports)
+
+    restore_objects(api, str(tmp_path), 'src', until=first)
+
+    assert api.contents('src') == {
+        'm1': {'expression': 'SELECT 1'}, 'm2': {'expression': 'SELECT 2'}}
+    assert api.imports == []
+
+
+def test_restore_into_other_project_replays_tokens(api, tmp_path):
+    backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+    api.put('src', 'm1', {'expression': 'SELECT 10'})
+    backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+
+    restore_objects(api, str(tmp_path), 'dst')
+
+    assert api.contents('dst') == {
+        'm1': {'expression': 'SELECT 10'}, 'm2': {'expression': 'SELECT 2'}}
+
+
+def test_restore_with_expired_token_fails(api, tmp_path):
+    backup_objects(api, 'src', str(tmp_path), categories=('metric',))
+    api.expired = set(api.exports)
+
+    with pytest.raises(BackupExpired):
+        restore_objects(api, str(tmp_path), 'dst')
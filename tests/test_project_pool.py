@@ -0,0 +1,179 @@
+import json
+import time
+import threading
+
+from grey_poupon.project_pool import ProjectPool
+
+
+class FakeClient(object):
+    """
+    Creates projects in memory. New projects get ENABLED once
+    `enabled` is set.
+    """
+
+    def __init__(self):
+        self.enabled = threading.Event()
+        self.enabled.set()
+        self.projects = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def create_project(self, token, title, db, environment,
+                       project_template=None):
+        with self._lock:
+            pid = 'p%s' % (len(self.projects) + 1)
+            self.projects[pid] = {'title': title, 'state': 'LOADING'}
+        return pid
+
+    def wait_for_project(self, project_id, timeout=600):
+        if not self.enabled.wait(timeout):
+            raise Exception('timeout')
+        self.projects[project_id]['state'] = 'ENABLED'
+
+    def create_ready_project(self, token, title, db, environment,
+                             project_template=None, timeout=600):
+        self.calls.append(('create_ready_project', title))
+        pid = self.create_project(token, title, db, environment)
+        self.projects[pid]['state'] = 'ENABLED'
+        return pid
+
+    def get_project_state(self, project_id):
+        return self.projects[project_id]['state']
+
+    def rename_project(self, project_id, title):
+        self.calls.append(('rename_project', project_id, title))
+        self.projects[project_id]['title'] = title
+
+    def delete_project(self, project_id):
+        self.calls.append(('delete_project', project_id))
+        self.projects[project_id]['state'] = 'DELETED'
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def ready(pool):
+    with pool._lock:
+        return [pid for pids in pool._ready.values() for pid in pids]
+
+
+def test_acquire_from_warm_pool():
+    client = FakeClient()
+    pool = ProjectPool(client, 'token', size=2)
+    wait_until(lambda: len(ready(pool)) == 2)
+
+    pid = pool.acquire(title='Backup')
+
+    assert pid in ('p1', 'p2')
+    assert client.projects[pid]['title'] == 'Backup'
+    assert client.calls == [('rename_project', pid, 'Backup')]
+    # the pool is refilled in the background
+    wait_until(lambda: len(ready(pool)) == 2)
+    assert pid not in ready(pool)
+    pool.close()
+
+
+def test_acquire_from_empty_pool_creates_project():
+    client = FakeClient()
+    client.enabled.clear()
+    pool = ProjectPool(client, 'token', size=1)
+
+    pid = pool.acquire(title='Backup')
+
+    assert client.calls == [('create_ready_project', 'Backup')]
+    assert client.projects[pid]['state'] == 'ENABLED'
+    client.enabled.set()
+    pool.close()
+
+
+def test_state_path_keeps_projects_for_next_pool(tmp_path):
+    state_path = str(tmp_path / 'pool.json')
+    client = FakeClient()
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path)
+    wait_until(lambda: len(ready(pool)) == 1)
+
+    idle = pool.close(delete_idle=False)
+
+    assert idle == ['p1']
+    with open(state_path) as state_file:
+        assert json.load(state_file) == [{
+            'pid': 'p1', 'environment': 'DEVELOPMENT', 'driver': 'Pg',
+            'state': 'ready'
+        }]
+
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path)
+    assert pool.acquire() == 'p1'
+    pool.close()
+    assert ('delete_project', 'p1') not in client.calls
+
+
+def test_state_path_drops_projects_gone_since(tmp_path):
+    state_path = str(tmp_path / 'pool.json')
+    client = FakeClient()
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path)
+    wait_until(lambda: len(ready(pool)) == 1)
+    pool.close(delete_idle=False)
+    client.projects['p1']['state'] = 'DELETED'
+
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path,
+                       warm=())
+    assert pool.acquire() != 'p1'
+    pool.close()
+
+
+def test_close_deletes_pending_project_once_ready(tmp_path):
+    state_path = str(tmp_path / 'pool.json')
+    client = FakeClient()
+    client.enabled.clear()
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path)
+    wait_until(lambda: 'p1' in client.projects)
+
+    assert pool.close(delete_idle=True, timeout=0.1) == []
+    assert pool._worker.is_alive()
+
+    client.enabled.set()
+    pool._worker.join(5)
+    assert client.calls == [('delete_project', 'p1')]
+    with open(state_path) as state_file:
+        assert json.load(state_file) == []
+
+
+def test_close_keeps_pending_project_for_next_pool(tmp_path):
+    state_path = str(tmp_path / 'pool.json')
+    client = FakeClient()
+    client.enabled.clear()
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path)
+    wait_until(lambda: 'p1' in client.projects)
+
+    assert pool.close(delete_idle=False, timeout=0.1) == []
+    with open(state_path) as state_file:
+        assert json.load(state_file)[0]['state'] == 'pending'
+
+    client.enabled.set()
+    pool._worker.join(5)
+    with open(state_path) as state_file:
+        assert json.load(state_file)[0]['state'] == 'ready'
+
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path)
+    assert pool.acquire() == 'p1'
+    assert client.calls == []
+    pool.close()
+
+
+def test_pending_project_of_earlier_run_is_finished(tmp_path):
+    state_path = str(tmp_path / 'pool.json')
+    client = FakeClient()
+    client.projects['p0'] = {'title': 'pool', 'state': 'LOADING'}
+    with open(state_path, 'w') as state_file:
+        json.dump([{'pid': 'p0', 'environment': 'DEVELOPMENT',
+                    'driver': 'Pg', 'state': 'pending'}], state_file)
+
+    pool = ProjectPool(client, 'token', size=1, state_path=state_path)
+    wait_until(lambda: ready(pool) == ['p0'])
+
+    assert pool.acquire() == 'p0'
+    pool.close()
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from grey_poupon import GreyPoupon
+
+DATA = b''.join(b'%d,%d\n' % (i, i) for i in range(10000))
+
+
+class RawReportStandIn(BaseHTTPRequestHandler):
+    """
+    Serves DATA as the raw export result, honouring Range and If-Range.
+    """
+    etag = '"v1"'
+    data = DATA
+    not_ready = 0
+    stall = 0
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.dumps({'uri': '/gdc/raw/1'}).encode('utf-8')
+        self.send_response(201)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cls = RawReportStandIn
+        cls.requests.append(dict(self.headers))
+
+        if cls.not_ready:
+            cls.not_ready -= 1
+            self.send_response(202)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if cls.stall:
+            cls.stall -= 1
+            time.sleep(1)
+            return
+
+        start = 0
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if range_header and (if_range is None or if_range == cls.etag):
+            start = int(range_header.split('=')[1].rstrip('-'))
+            if start >= len(cls.data):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            start = 0
+            self.send_response(200)
+
+        body = cls.data[start:]
+        self.send_header('ETag', cls.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def client():
+    RawReportStandIn.etag = '"v1"'
+    RawReportStandIn.not_ready = 0
+    RawReportStandIn.stall = 0
+    RawReportStandIn.requests = []
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RawReportStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    client = GreyPoupon(sub_domain='test')
+    client.base_url = 'http://127.0.0.1:%s' % server.server_port
+    yield client
+
+    server.shutdown()
+
+
+def write_part(path, data, result_uri, etag='"v1"'):
+    with open(path + '.part', 'wb') as f:
+        f.write(data)
+    with open(path + '.part.json', 'w') as f:
+        json.dump({'result_uri': result_uri, 'etag': etag}, f)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_download_from_scratch(client, tmp_path):
+    path = str(tmp_path / 'report.csv')
+    assert client.download_raw_report('/gdc/raw/1', path)
+    assert read(path) == DATA
+    assert not os.path.exists(path + '.part')
+    assert not os.path.exists(path + '.part.json')
+
+
+def test_not_ready(client, tmp_path):
+    RawReportStandIn.not_ready = 1
+    assert not client.download_raw_report('/gdc/raw/1', str(tmp_path / 'r.csv'))
+
+
+def test_resume_same_result_appends(client, tmp_path):
+    path = str(tmp_path / 'report.csv')
+    write_part(path, DATA[:1000], '/gdc/raw/1')
+
+    assert client.download_raw_report('/gdc/raw/1', path)
+    assert read(path) == DATA
+    assert RawReportStandIn.requests[0]['Range'] == 'bytes=1000-'
+    assert RawReportStandIn.requests[0]['If-Range'] == '"v1"'
+
+
+def test_part_of_other_result_starts_over(client, tmp_path):
+    path = str(tmp_path / 'report.csv')
+    write_part(path, b'old snapshot', '/gdc/raw/0')
+
+    assert client.download_raw_report('/gdc/raw/1', path)
+    assert read(path) == DATA
+    assert 'Range' not in RawReportStandIn.requests[0]
+
+
+def test_changed_result_starts_over(client, tmp_path):
+    path = str(tmp_path / 'report.csv')
+    write_part(path, b'x' * 1000, '/gdc/raw/1', etag='"v0"')
+
+    assert client.download_raw_report('/gdc/raw/1', path)
+    assert read(path) == DATA
+
+
+def test_complete_part_is_finished(client, tmp_path):
+    path = str(tmp_path / 'report.csv')
+    write_part(path, DATA, '/gdc/raw/1')
+
+    assert client.download_raw_report('/gdc/raw/1', path)
+    assert read(path) == DATA
+
+
+def test_export_retries_on_timeout(client, tmp_path):
+    RawReportStandIn.not_ready = 1
+    RawReportStandIn.stall = 1
+    path = str(tmp_path / 'report.csv')
+
+    assert client.export_raw_report('p', '/gdc/md/p/obj/1', path,
+                                    poll_interval=0,
+                                    timeout=(1, 0.2)) == path
+    assert read(path) == DATA
+    assert len(RawReportStandIn.requests) == 3
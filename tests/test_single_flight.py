@@ -0,0 +1,155 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from grey_poupon import GreyPoupon
+from grey_poupon.single_flight import SingleFlight
+
+
+def run_concurrently(func, n=10):
+    results = []
+    barrier = threading.Barrier(n)
+
+    def worker():
+        barrier.wait()
+        results.append(func())
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_calls_are_coalesced():
+    single_flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'result'
+
+    results = run_concurrently(lambda: single_flight.do('key', slow))
+
+    assert results == ['result'] * 10
+    assert len(calls) == 1
+
+
+def test_result_is_memoised_until_ttl_expires():
+    single_flight = SingleFlight(ttl=0.2)
+    calls = []
+
+    def func():
+        calls.append(1)
+        return len(calls)
+
+    assert single_flight.do('key', func) == 1
+    assert single_flight.do('key', func) == 1
+    time.sleep(0.3)
+    assert single_flight.do('key', func) == 2
+
+
+def test_no_memo_without_ttl_or_when_not_cacheable():
+    calls = []
+
+    def func():
+        calls.append(1)
+        return len(calls)
+
+    assert SingleFlight(ttl=0).do('key', func) == 1
+    single_flight = SingleFlight(ttl=10)
+    single_flight.do('key', func, cacheable=lambda result: False)
+    assert single_flight.do('key', func, cacheable=lambda result: False) == 3
+
+
+def test_memoised_result_is_ignored_without_use_cache():
+    single_flight = SingleFlight(ttl=10)
+    assert single_flight.do('key', lambda: 1) == 1
+    assert single_flight.do('key', lambda: 2, use_cache=False) == 2
+    # the fresh result replaces the memoised one
+    assert single_flight.do('key', lambda: 3) == 2
+
+
+def test_errors_are_shared_and_not_memoised():
+    single_flight = SingleFlight(ttl=10)
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError('boom')
+
+    errors = []
+
+    def call():
+        try:
+            single_flight.do('key', fail)
+        except ValueError as e:
+            errors.append(e)
+
+    run_concurrently(call, n=5)
+    assert len(errors) == 5
+
+    assert single_flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_forget():
+    single_flight = SingleFlight(ttl=10)
+    single_flight.do('key', lambda: 1)
+    single_flight.forget('key')
+    assert single_flight.do('key', lambda: 2) == 2
+    single_flight.forget()
+    assert single_flight.do('key', lambda: 3) == 3
+
+
+class ObjectStandIn(BaseHTTPRequestHandler):
+    """
+    A metadata object and a task status, both changing on every write.
+    """
+    version = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith('/gdc/md/p/tasks/'):
+            status = 'OK' if ObjectStandIn.version else 'RUNNING'
+            return self._reply({'wTaskStatus': {'status': status}})
+        self._reply({'metric': {'meta': {'version': ObjectStandIn.version}}})
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        ObjectStandIn.version += 1
+        self._reply({})
+
+
+def test_client_forgets_memoised_responses_on_writes():
+    ObjectStandIn.version = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ObjectStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = GreyPoupon(sub_domain='test', cache_ttl=60)
+    client.base_url = 'http://127.0.0.1:%s' % server.server_port
+    uri = '/gdc/md/p/obj/1'
+
+    try:
+        assert client.get_task_status('/gdc/md/p/tasks/1') == 'RUNNING'
+        assert client.get_object(uri)['metric']['meta']['version'] == 0
+
+        ObjectStandIn.version = 1
+        # polls are never answered from the memo, other reads are
+        assert client.get_task_status('/gdc/md/p/tasks/1') == 'OK'
+        assert client.get_object(uri)['metric']['meta']['version'] == 0
+
+        client.update_object(uri, {'metric': {'meta': {}}})
+        assert client.get_object(uri)['metric']['meta']['version'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
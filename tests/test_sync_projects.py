@@ -0,0 +1,102 @@
+import importlib
+
+import click
+import pytest
+
+from grey_poupon.config_store import ConfigStore
+from grey_poupon.sync_projects import sync_objects
+
+# the package exports the gp_cli command under the name of its module
+gp_cli = importlib.import_module('grey_poupon.gp_cli')
+
+
+def obj(category, identifier, tags='sync'):
+    return {
+        'category': category,
+        'identifier': identifier,
+        'link': '/gdc/md/p/obj/%s' % identifier,
+        'tags': tags,
+        'updated': '2020-01-01 00:00:00'
+    }
+
+
+class FakeClient(object):
+    def __init__(self, objects):
+        self.objects = objects
+        self.calls = []
+
+    def list_objects(self, project_id, categories):
+        return [o for o in self.objects[project_id]
+                if o['category'] in categories]
+
+    def export_objects(self, project_id, object_uris):
+        self.calls.append(('export', project_id, object_uris))
+        return 'export-status', 'token'
+
+    def is_export_done(self, status_uri):
+        return True
+
+    def import_objects(self, project_id, token):
+        self.calls.append(('import', project_id, token))
+        return 'import-status'
+
+    def delete_objects(self, project_id, object_uris):
+        self.calls.append(('delete', project_id, object_uris))
+        return []
+
+
+def test_sync_imports_before_deleting_dependents_first():
+    categories = ('metric', 'report', 'projectDashboard', 'attribute')
+    client = FakeClient({
+        'master': [obj('metric', 'm1'), obj('report', 'r1'),
+                   obj('metric', 'untagged', tags='other')],
+        'slave': [obj('metric', 'm1'), obj('metric', 'm2'),
+                  obj('report', 'r2'), obj('projectDashboard', 'd2'),
+                  obj('attribute', 'a2'), obj('metric', 'm3', tags='other')]
+    })
+
+    sync_objects(client, 'master', 'slave', 'sync', categories=categories)
+
+    assert client.calls == [
+        ('export', 'master', ['/gdc/md/p/obj/m1', '/gdc/md/p/obj/r1']),
+        ('import', 'slave', 'token'),
+        ('delete', 'slave', ['/gdc/md/p/obj/d2', '/gdc/md/p/obj/r2',
+                             '/gdc/md/p/obj/m2'])
+    ]
+
+
+def test_sync_without_changes_does_nothing():
+    client = FakeClient({'master': [], 'slave': [obj('metric', 'm', 'x')]})
+
+    sync_objects(client, 'master', 'slave', 'sync')
+
+    assert client.calls == []
+
+
+def test_sync_fails_when_objects_are_not_deleted():
+    client = FakeClient({'master': [], 'slave': [obj('metric', 'm2')]})
+    client.delete_objects = lambda project_id, object_uris: object_uris
+
+    with pytest.raises(Exception, match='could not delete'):
+        sync_objects(client, 'master', 'slave', 'sync')
+
+
+def test_cli_rejects_unknown_categories(tmp_path, monkeypatch):
+    monkeypatch.setattr(gp_cli, 'CONFIG_PATH', str(tmp_path))
+    monkeypatch.setattr(gp_cli, 'LOGIN_FILE', str(tmp_path / 'login.json'))
+    monkeypatch.setattr(gp_cli, 'CONFIG_SYNC', str(tmp_path / 'sync.json'))
+    monkeypatch.setattr(gp_cli, 'CONFIG_DB', str(tmp_path / 'sync.db'))
+    synced = []
+    monkeypatch.setattr(gp_cli, 'sync_objects',
+                        lambda **kwargs: synced.append(kwargs))
+
+    store = ConfigStore(str(tmp_path / 'sync.db'))
+    store.set_slaves('company.org', 'master', [
+        {'slave_pid': 'good', 'tag': 'sync', 'categories': ['metric']},
+        {'slave_pid': 'bad', 'tag': 'sync', 'categories': ['metrics']}
+    ])
+    store.close()
+
+    with pytest.raises(click.ClickException, match='metrics.*bad'):
+        gp_cli.sync_metrics_using_config_file()
+    assert synced == []
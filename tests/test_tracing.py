@@ -0,0 +1,89 @@
+import json
+import time
+import threading
+
+import pytest
+
+from grey_poupon.tracing import tracer, traced
+
+
+@pytest.fixture
+def enabled_tracer():
+    tracer.clear()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.clear()
+
+
+@traced
+def slow(seconds):
+    time.sleep(seconds)
+    return 'done'
+
+
+@traced
+def slow_items(n, seconds):
+    for i in range(n):
+        time.sleep(seconds)
+        yield i
+
+
+def test_spans_are_only_recorded_when_enabled():
+    tracer.clear()
+    assert slow(0) == 'done'
+    assert list(slow_items(2, 0)) == [0, 1]
+    assert tracer.events == []
+
+
+def test_traced_function(enabled_tracer):
+    assert slow(0.1) == 'done'
+
+    event, = enabled_tracer.events
+    assert event['name'] == 'test_tracing.slow'
+    assert event['cat'] == 'test_tracing'
+    assert event['ph'] == 'X'
+    assert event['tid'] == threading.get_ident()
+    assert 100000 <= event['dur'] < 1000000
+
+
+def test_traced_generator_excludes_consumer_time(enabled_tracer):
+    for _ in slow_items(3, 0.05):
+        time.sleep(0.2)
+
+    event, = enabled_tracer.events
+    assert event['name'] == 'test_tracing.slow_items'
+    assert 150000 <= event['dur'] < 500000
+
+
+def test_traced_generator_closed_early(enabled_tracer):
+    items = slow_items(10, 0.01)
+    assert next(items) == 0
+    items.close()
+
+    event, = enabled_tracer.events
+    assert event['dur'] < 100000
+
+
+def test_dump(enabled_tracer, tmp_path):
+    with enabled_tracer.span('test.main', answer=42):
+        worker = threading.Thread(target=slow, args=(0,), name='worker')
+        worker.start()
+        worker.join()
+
+    path = tmp_path / 'trace.json'
+    enabled_tracer.dump(str(path))
+    trace = json.loads(path.read_text())
+
+    assert trace['displayTimeUnit'] == 'ms'
+    spans = {e['name']: e for e in trace['traceEvents'] if e['ph'] == 'X'}
+    assert set(spans) == {'test.main', 'test_tracing.slow'}
+    assert spans['test.main']['args'] == {'answer': '42'}
+    assert spans['test.main']['dur'] >= spans['test_tracing.slow']['dur']
+
+    names = {e['tid']: e['args']['name']
+             for e in trace['traceEvents'] if e['ph'] == 'M'}
+    assert names[spans['test.main']['tid']] == threading.current_thread().name
+    # the worker is gone by now, its tid is kept as name
+    assert names[spans['test_tracing.slow']['tid']] in (
+        'worker', str(spans['test_tracing.slow']['tid']))
@@ -0,0 +1,171 @@
+import os
+import json
+import zipfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from grey_poupon import GreyPoupon
+from grey_poupon.upload_data import load_data, prepare_upload, upload_files
+
+
+class WebDAVStandIn(BaseHTTPRequestHandler):
+    """
+    Minimal WebDAV server (MKCOL, PUT, HEAD, GET) serving a local
+    directory, plus the pull ETL endpoints.
+    """
+    root = None
+    puts = []
+    loads = []
+
+    def log_message(self, *args):
+        pass
+
+    def _path(self):
+        return os.path.join(self.root, self.path.split('/gdc/uploads/')[1])
+
+    def _reply(self, status, body=None):
+        data = json.dumps(body).encode('utf-8') if body else b''
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_MKCOL(self):
+        if os.path.exists(self._path()):
+            return self._reply(405)
+        os.makedirs(self._path())
+        self._reply(201)
+
+    def do_PUT(self):
+        length = int(self.headers['Content-Length'])
+        with open(self._path(), 'wb') as f:
+            f.write(self.rfile.read(length))
+        self.puts.append(self.path)
+        self._reply(201)
+
+    def do_HEAD(self):
+        if not os.path.isfile(self._path()):
+            return self._reply(404)
+        self.send_response(200)
+        self.send_header('Content-Length', str(os.path.getsize(self._path())))
+        self.end_headers()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.loads.append(body['pullIntegration'])
+        self._reply(201, {'pull2Task': {'links': {'poll': '/gdc/poll/1'}}})
+
+    def do_GET(self):
+        if '/gdc/uploads/' not in self.path:
+            return self._reply(200, {'wTaskStatus': {'status': 'OK'}})
+        if not os.path.isfile(self._path()):
+            return self._reply(404)
+        with open(self._path(), 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def client(tmp_path):
+    root = tmp_path / 'staging'
+    root.mkdir()
+    WebDAVStandIn.root = str(root)
+    WebDAVStandIn.puts = []
+    WebDAVStandIn.loads = []
+
+    server = HTTPServer(('127.0.0.1', 0), WebDAVStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = 'http://127.0.0.1:%s' % server.server_port
+    client = GreyPoupon(sub_domain='test',
+                        staging_url=base_url + '/gdc/uploads')
+    client.base_url = base_url
+    yield client
+
+    server.shutdown()
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    paths = []
+    for name in ('a.csv', 'b.csv'):
+        path = tmp_path / name
+        path.write_text('id,value\n' + ''.join('%s,%s\n' % (i, i) for i in range(1000)))
+        paths.append(str(path))
+    return paths
+
+
+UPLOAD_INFO = {'dataSetSLIManifest': {'dataSet': 'dataset.test', 'parts': []}}
+
+
+def test_load_data_uploads_etl_layout(client, csv_files):
+    remote_dir = load_data(client, 'pid', csv_files, UPLOAD_INFO,
+                           poll_interval=0)
+
+    uploaded = os.path.join(WebDAVStandIn.root, remote_dir)
+    assert sorted(os.listdir(uploaded)) == ['a.csv', 'b.csv', 'upload_info.json']
+    with open(os.path.join(uploaded, 'a.csv')) as f, open(csv_files[0]) as g:
+        assert f.read() == g.read()
+    assert WebDAVStandIn.loads == [remote_dir]
+
+
+def test_load_data_compressed(client, csv_files):
+    remote_dir = load_data(client, 'pid', csv_files, UPLOAD_INFO,
+                           compress=True, poll_interval=0)
+
+    uploaded = os.path.join(WebDAVStandIn.root, remote_dir)
+    assert os.listdir(uploaded) == ['upload.zip']
+    with zipfile.ZipFile(os.path.join(uploaded, 'upload.zip')) as archive:
+        assert sorted(archive.namelist()) == ['a.csv', 'b.csv', 'upload_info.json']
+
+
+def test_upload_resumes_only_same_content(client, csv_files, tmp_path):
+    files, checksum = prepare_upload(csv_files, UPLOAD_INFO, str(tmp_path / 'w'))
+    remote_dir = 'gp-%s' % checksum[:32]
+
+    # interrupted run: a.csv made it, b.csv was cut short
+    upload_files(client, files[:2], remote_dir)
+    with open(os.path.join(WebDAVStandIn.root, remote_dir, 'b.csv'), 'w') as f:
+        f.write('id')
+    WebDAVStandIn.puts = []
+
+    upload_files(client, files, remote_dir)
+    assert WebDAVStandIn.puts == ['/gdc/uploads/%s/b.csv' % remote_dir]
+
+    # same size, different content: a new directory
+    with open(csv_files[0], 'r+') as f:
+        f.write('ID')
+    _, other = prepare_upload(csv_files, UPLOAD_INFO, str(tmp_path / 'w'))
+    assert other != checksum
+
+
+def test_upload_replaces_corrupted_file_of_same_size(client, csv_files, tmp_path):
+    files, checksum = prepare_upload(csv_files, UPLOAD_INFO, str(tmp_path / 'w'))
+    remote_dir = 'gp-%s' % checksum[:32]
+    upload_files(client, files, remote_dir)
+
+    remote_file = os.path.join(WebDAVStandIn.root, remote_dir, 'a.csv')
+    with open(remote_file, 'r+') as f:
+        f.write('ID')
+    WebDAVStandIn.puts = []
+
+    upload_files(client, files, remote_dir)
+    assert WebDAVStandIn.puts == ['/gdc/uploads/%s/a.csv' % remote_dir]
+    with open(remote_file) as f, open(csv_files[0]) as g:
+        assert f.read() == g.read()
+
+
+def test_duplicate_file_names_are_rejected(csv_files, tmp_path):
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'a.csv').write_text('id\n')
+
+    with pytest.raises(Exception, match='a.csv'):
+        prepare_upload(csv_files + [str(other / 'a.csv')], UPLOAD_INFO,
+                       str(tmp_path / 'w'))